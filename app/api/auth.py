@@ -3,13 +3,18 @@ from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from app.db.database import SessionLocal
+from app.db.database import get_db, run_db
 from app.schemas.auth import Token, TokenData
 from app.schemas.user import UserCreate, UserResponse
-from app.crud.user import create_user, get_user_by_username
+from app.crud.user import create_user, get_user_by_username, update_password_hash
 from app.core.security import (
-    verify_password,
+    verify_password_async,
+    hash_password_async,
     create_access_token,
+    decode_access_token,
+    token_ttl,
+    principal_cache,
+    batch_principal,
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
@@ -18,21 +23,17 @@ from app.core.security import (
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    principal = batch_principal.get()
+    if principal is not None:
+        return principal
     credentials_exception = HTTPException(
         status_code=401,
         detail="No se pudo validar el token",
         headers={"WWW-Authenticate": "Bearer"}
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -40,23 +41,36 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_username(db, nombre_usuario=token_data.username)
+    cache_key = (token_data.username, token)
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    user = await run_db(db, get_user_by_username, nombre_usuario=token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    principal = UserResponse.model_validate(user, from_attributes=True)
+    principal_cache.set(cache_key, principal, ttl=token_ttl(payload))
+    return principal
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = get_user_by_username(db, user.nombre_usuario)
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_db(db, get_user_by_username, user.nombre_usuario)
     if existing_user:
         raise HTTPException(status_code=400, detail="El nombre de usuario ya está en uso")
-    return create_user(db, user)
+    hashed_password = await hash_password_async(user.contrasenia)
+    return await run_db(db, create_user, user, hashed_password=hashed_password)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = get_user_by_username(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.contrasenia):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_db(db, get_user_by_username, form_data.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    valid, new_hash = await verify_password_async(form_data.password, user.contrasenia)
+    if not valid:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    if new_hash:
+        await run_db(db, update_password_hash, user.id, new_hash)
     
     access_token = create_access_token(
         data={"sub": user.nombre_usuario},
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from app.schemas.batch import BatchOperation, BatchResponse
+from app.api.auth import get_current_user
+from app.core.batch import FORWARDED_HEADERS, is_excluded, run_batch
+from app.core.config import settings
+from app.core.security import batch_principal
+
+router = APIRouter()
+
+
+@router.post("", response_model=BatchResponse)
+async def batch_endpoint(operations: list[BatchOperation], request: Request, current_user = Depends(get_current_user)):
+
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Máximo {settings.BATCH_MAX_OPERATIONS} operaciones por lote")
+    for operation in operations:
+        if not operation.path.startswith("/") or is_excluded(operation.path):
+            raise HTTPException(status_code=400, detail=f"Operación no permitida en un lote: {operation.path}")
+
+    inherited = [(name, value) for name, value in request.scope["headers"] if name in FORWARDED_HEADERS]
+    token = batch_principal.set(current_user)
+    try:
+        results = await run_batch(request.app, request.scope, operations, inherited)
+    finally:
+        batch_principal.reset(token)
+    # Bodies are already decoded JSON; like the fast list paths, this skips response_model validation.
+    return ORJSONResponse({"results": results})
@@ -1,49 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.crud.category import create_category, get_category, get_categories, update_category, delete_category
-from app.db.database import SessionLocal
+from app.crud.category import (
+    create_category,
+    get_category,
+    get_category_etag,
+    get_categories,
+    get_categories_etag,
+    update_category,
+    delete_category
+)
+from app.db.database import get_db, run_db
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.etag import make_etag, etag_matches, not_modified
+from app.core.config import settings
+from app.core.serialization import fields_param, json_rows, project
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=CategoryResponse)
-def create_category_endpoint(category: CategoryCreate, db: Session = Depends(get_db)):
+async def create_category_endpoint(category: CategoryCreate, db: Session = Depends(get_db)):
  
-    return create_category(db, category)
+    return await run_db(db, create_category, category)
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category_endpoint(category_id: int, db: Session = Depends(get_db)):
+async def get_category_endpoint(category_id: int, request: Request, response: Response, db: Session = Depends(get_db), fields: Optional[tuple] = Depends(fields_param(CategoryResponse))):
   
-    category = get_category(db, category_id)
+    etag = await run_db(db, get_category_etag, category_id)
+    if etag and fields:
+        etag = make_etag(etag, fields)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    category = await run_db(db, get_category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="No se encuentra la categoria")
+    headers = {"ETag": etag} if etag else {}
+    if fields:
+        # Categories are served from the in-process snapshot, so there is no SELECT to narrow.
+        return ORJSONResponse({name: getattr(category, name) for name in fields}, headers=headers)
+    response.headers.update(headers)
     return category
 
 @router.get("/", response_model=list[CategoryResponse])
-def get_categories_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_categories_endpoint(request: Request, response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_db), fields: Optional[tuple] = Depends(fields_param(CategoryResponse))):
 
-    return get_categories(db, skip, limit)
+    cursor = decode_cursor(after)
+    etag = make_etag(await run_db(db, get_categories_etag), skip, limit, cursor, fields)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if settings.FAST_JSON or fields:
+        rows = await run_db(db, get_categories, skip, limit, after=cursor, as_rows=True)
+        response = json_rows([project(row, fields) for row in rows])
+        set_next_cursor(response, rows, limit)
+        response.headers["ETag"] = etag
+        return response
+    categories = await run_db(db, get_categories, skip, limit, after=cursor)
+    set_next_cursor(response, categories, limit)
+    response.headers["ETag"] = etag
+    return categories
 
 @router.put("/{category_id}", response_model=CategoryResponse)
-def update_category_endpoint(category_id: int, category: CategoryUpdate, db: Session = Depends(get_db)):
+async def update_category_endpoint(category_id: int, category: CategoryUpdate, db: Session = Depends(get_db)):
 
-    updated_category = update_category(db, category_id, category)
+    updated_category = await run_db(db, update_category, category_id, category)
     if not updated_category:
         raise HTTPException(status_code=404, detail="No se encuentra la categoria")
     return updated_category
 
 @router.delete("/{category_id}", response_model=CategoryResponse)
-def delete_category_endpoint(category_id: int, db: Session = Depends(get_db)):
+async def delete_category_endpoint(category_id: int, db: Session = Depends(get_db)):
   
-    deleted_category = delete_category(db, category_id)
+    deleted_category = await run_db(db, delete_category, category_id)
     if not deleted_category:
         raise HTTPException(status_code=404, detail="No se encuentra la categoria")
     return deleted_category
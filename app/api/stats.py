@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+from app.core.security import token_cache, principal_cache, hash_pool_stats
+from app.crud.category import category_cache
+from app.db.database import get_pool_status
+from app.core.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/cache")
+async def cache_stats():
+    return {
+        "tokens": token_cache.stats(),
+        "principals": principal_cache.stats(),
+        "categories": category_cache.stats(),
+    }
+
+
+@router.get("/password-hashing")
+async def password_hashing_stats():
+    return hash_pool_stats()
+
+
+@router.get("/pool")
+async def pool_stats():
+    return get_pool_status()
+
+
+def _collect_app_stats():
+    caches = {"tokens": token_cache.stats(), "principals": principal_cache.stats()}
+    yield "cache_hits_total", "counter", "Cache hits by cache.", [
+        ({"cache": name}, stats["hits"]) for name, stats in caches.items()
+    ] + [({"cache": "categories"}, category_cache.hits)]
+    yield "cache_misses_total", "counter", "Cache misses by cache.", [
+        ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+    ] + [({"cache": "categories"}, category_cache.misses)]
+
+    hashing = hash_pool_stats()
+    yield "password_hash_rejections_total", "counter", "Hash operations rejected with 503.", [
+        ({}, hashing["rejections"])
+    ]
+
+    pools = get_pool_status()
+    for key, metric_type, documentation in (
+        ("checked_out", "gauge", "Connections checked out of the pool."),
+        ("idle", "gauge", "Idle connections in the pool."),
+        ("overflow", "gauge", "Overflow connections currently open."),
+        ("overflow_events", "counter", "Checkouts that opened an overflow connection."),
+        ("timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+        ("wait_seconds_total", "counter", "Total seconds spent waiting for a connection."),
+    ):
+        samples = [({"engine": name}, pool[key]) for name, pool in pools.items() if key in pool]
+        yield f"db_pool_{key}", metric_type, documentation, samples
+
+
+REGISTRY.add_collector(_collect_app_stats)
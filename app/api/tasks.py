@@ -1,48 +1,223 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse
-from app.crud.task import create_task, get_task, get_tasks, update_task, delete_task
-from app.db.database import SessionLocal
+from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskBulkResponse, TaskFilters, TaskStats, TaskImportStatus, TASK_EXPANSION_SCHEMAS
+from app.crud.task import (
+    create_task,
+    get_task,
+    get_task_with_version,
+    get_tasks,
+    update_task,
+    delete_task,
+    create_tasks_bulk,
+    update_tasks_bulk,
+    delete_tasks_bulk,
+    export_tasks_query,
+    EXPORT_COLUMNS,
+    TASK_EXPANSIONS,
+    response_columns
+)
+from app.crud.task_stats import get_task_stats, get_task_version, rebuild_task_counters
+from app.db.database import get_db, get_read_db, run_db, stream_partitions, choose_read_replica
+from app.core.config import settings
+from app.core.export import EXPORT_MEDIA_TYPES, encode_export
+from app.core.etag import make_etag, etag_matches, not_modified
+from app.core.events import broadcaster, encode_event
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.serialization import fields_param, json_rows
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+
+def get_expand(expand: Optional[str] = None) -> tuple:
+    if not expand:
+        return ()
+    names = tuple(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+    unknown = [name for name in names if name not in TASK_EXPANSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Expansión no soportada: {', '.join(unknown)}")
+    return names
+
+
+def _expanded(task, expand: tuple, fields: Optional[tuple] = None) -> dict:
+    # Built from plain attributes so columns and relations that were not requested are never lazy-loaded.
+    data = {field: getattr(task, field) for field in fields or TaskResponse.model_fields}
+    for name in expand:
+        related = getattr(task, name)
+        data[name] = related and TASK_EXPANSION_SCHEMAS[name].model_validate(related, from_attributes=True).model_dump()
+    return data
+
+
+# Fixed paths are registered before "/{task_id}" so they are never parsed as an id.
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats_endpoint(db: Session = Depends(get_read_db), user_id: int = 1):
+
+    return await run_db(db, get_task_stats, user_id)
+
+@router.post("/stats/rebuild", response_model=TaskStats)
+async def rebuild_task_stats_endpoint(db: Session = Depends(get_db), user_id: int = 1):
+
+    await run_db(db, rebuild_task_counters, user_id)
+    return await run_db(db, get_task_stats, user_id)
+
+@router.get("/export")
+async def export_tasks_endpoint(request: Request, db: Session = Depends(get_db), user_id: int = 1, format: Literal["ndjson", "csv"] = "ndjson", filters: TaskFilters = Depends()):
+
+    # Building the query may probe the database (the SQLite FTS check), so not on the loop.
+    query = await run_db(db, export_tasks_query, user_id, filters)
+    partitions = stream_partitions(query, settings.EXPORT_BATCH_SIZE, replica=choose_read_replica(request))
+    chunks = encode_export(partitions, format, [column.key for column in EXPORT_COLUMNS])
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+@router.get("/stream")
+async def stream_tasks_endpoint(user_id: int = 1):
+
+    async def events():
+        subscription = broadcaster.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                message = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+                if message is None:
+                    # Comment line: keeps proxies from timing out and surfaces disconnects.
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {message['type']}\ndata: {encode_event(message)}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def task_events_websocket(websocket: WebSocket, user_id: int = 1):
+
+    await websocket.accept()
+    subscription = broadcaster.subscribe(user_id)
     try:
-        yield db
+        while True:
+            message = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+            await websocket.send_text(encode_event(message or {"type": "keepalive"}))
+    except WebSocketDisconnect:
+        pass
     finally:
-        db.close()
+        broadcaster.unsubscribe(subscription)
+
+@router.post("/import", response_model=TaskImportStatus, status_code=202)
+async def import_tasks_endpoint(background_tasks: BackgroundTasks, file: UploadFile = File(...), user_id: int = 1, format: Optional[Literal["ndjson", "csv"]] = None):
+
+    # Imported on first use, not at startup: it is a rarely used endpoint.
+    from app.jobs.task_import import create_import_job
+
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+    job = await run_in_threadpool(create_import_job, file, format, user_id)
+    background_tasks.add_task(job.run)
+    return job.snapshot()
+
+@router.get("/import/{job_id}", response_model=TaskImportStatus)
+async def get_import_status_endpoint(job_id: str, db: Session = Depends(get_db)):
+
+    from app.jobs.task_import import get_import_status
+
+    # From the primary: a replica may not have the job row yet.
+    status = await run_db(db, get_import_status, job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="No se encontró la importación")
+    return status
+
+@router.post("/bulk", response_model=TaskBulkResponse)
+async def create_tasks_bulk_endpoint(tasks: list[dict], db: Session = Depends(get_db), user_id: int = 1):
+
+    return {"results": await run_db(db, create_tasks_bulk, tasks, user_id)}
+
+@router.patch("/bulk", response_model=TaskBulkResponse)
+async def update_tasks_bulk_endpoint(tasks: list[dict], db: Session = Depends(get_db)):
+
+    return {"results": await run_db(db, update_tasks_bulk, tasks)}
+
+@router.delete("/bulk", response_model=TaskBulkResponse)
+async def delete_tasks_bulk_endpoint(task_ids: list[int], db: Session = Depends(get_db)):
+
+    return {"results": await run_db(db, delete_tasks_bulk, task_ids)}
 
 @router.post("/", response_model=TaskResponse)
-def create_task_endpoint(task: TaskCreate, db: Session = Depends(get_db), user_id: int = 1):
+async def create_task_endpoint(task: TaskCreate, db: Session = Depends(get_db), user_id: int = 1):
  
-    return create_task(db, task, user_id)
+    return await run_db(db, create_task, task, user_id)
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task_endpoint(task_id: int, db: Session = Depends(get_db)):
+async def get_task_endpoint(task_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), expand: tuple = Depends(get_expand), fields: Optional[tuple] = Depends(fields_param(TaskResponse))):
  
-    task = get_task(db, task_id)
-    if not task:
+    if expand:
+        # No ETag: the task version does not change when a category or user does.
+        task = await run_db(db, get_task, task_id, include_archived=True, expand=expand, fields=fields)
+        if not task:
+            raise HTTPException(status_code=404, detail="No se encontró el Task")
+        return ORJSONResponse(_expanded(task, expand, fields))
+    # Archived tasks stay readable here; only the list hides them by default.
+    found = await run_db(db, get_task_with_version, task_id, include_archived=True, fields=fields)
+    if not found:
         raise HTTPException(status_code=404, detail="No se encontró el Task")
+    task, owner, version = found
+    etag = make_etag("task", task_id, owner, version, fields)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if settings.FAST_JSON or fields:
+        return ORJSONResponse(task, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return task
 
 @router.get("/", response_model=list[TaskResponse])
-def get_tasks_endpoint(db: Session = Depends(get_db), user_id: int = 1, skip: int = 0, limit: int = 100):
+async def get_tasks_endpoint(request: Request, response: Response, db: Session = Depends(get_read_db), user_id: int = 1, skip: int = 0, limit: int = 100, after: Optional[str] = None, filters: TaskFilters = Depends(), include_archived: bool = False, expand: tuple = Depends(get_expand), fields: Optional[tuple] = Depends(fields_param(TaskResponse))):
   
-    return get_tasks(db, user_id, skip, limit)
+    cursor = decode_cursor(after)
+    if expand:
+        # No ETag: the task version does not change when a category or user does.
+        columns = response_columns(fields) if fields else None
+        tasks = await run_db(db, get_tasks, user_id, skip, limit, after=cursor, filters=filters, columns=columns, include_archived=include_archived, expand=expand)
+        response = json_rows([_expanded(task, expand, fields) for task in tasks])
+        set_next_cursor(response, tasks, limit)
+        return response
+    # The version is read before the page, so a concurrent write can only make
+    # the ETag older than the body, never newer.
+    version = await run_db(db, get_task_version, user_id)
+    etag = make_etag("tasks", user_id, version, skip, limit, cursor, filters.model_dump(mode="json"), include_archived, fields)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if settings.FAST_JSON or include_archived or fields:
+        # Archive merges and sparse fieldsets always return column rows, already shaped for json_rows.
+        rows = await run_db(db, get_tasks, user_id, skip, limit, after=cursor, filters=filters, columns=response_columns(fields), include_archived=include_archived)
+        response = json_rows(rows)
+        set_next_cursor(response, rows, limit)
+        response.headers["ETag"] = etag
+        return response
+    tasks = await run_db(db, get_tasks, user_id, skip, limit, after=cursor, filters=filters)
+    set_next_cursor(response, tasks, limit)
+    response.headers["ETag"] = etag
+    return tasks
 
 @router.put("/{task_id}", response_model=TaskResponse)
-def update_task_endpoint(task_id: int, task: TaskUpdate, db: Session = Depends(get_db)):
+async def update_task_endpoint(task_id: int, task: TaskUpdate, db: Session = Depends(get_db)):
    
-    updated_task = update_task(db, task_id, task)
+    updated_task = await run_db(db, update_task, task_id, task)
     if not updated_task:
         raise HTTPException(status_code=404, detail="No se encontró el Task")
     return updated_task
 
 @router.delete("/{task_id}", response_model=TaskResponse)
-def delete_task_endpoint(task_id: int, db: Session = Depends(get_db)):
+async def delete_task_endpoint(task_id: int, db: Session = Depends(get_db)):
 
-    deleted_task = delete_task(db, task_id)
+    deleted_task = await run_db(db, delete_task, task_id)
     if not deleted_task:
         raise HTTPException(status_code=404, detail="No se encontro el Task")
     return deleted_task
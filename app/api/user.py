@@ -1,45 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.schemas.user import UserResponse, UserUpdate
-from app.crud.user import get_user, get_users, update_user, delete_user
-from app.db.database import SessionLocal
+from app.crud.user import get_user, get_users, update_user, delete_user, response_columns
+from app.core.config import settings
+from app.db.database import get_db, get_read_db, run_db
 from app.api.auth import get_current_user
+from app.core.security import hash_password_async
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.serialization import fields_param, json_rows
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/", response_model=list[UserResponse])
-def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def list_users(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_user), fields: Optional[tuple] = Depends(fields_param(UserResponse))):
 
-    return get_users(db, skip, limit)
+    if settings.FAST_JSON or fields:
+        rows = await run_db(db, get_users, skip, limit, after=decode_cursor(after), columns=response_columns(fields))
+        response = json_rows(rows)
+        set_next_cursor(response, rows, limit)
+        return response
+    users = await run_db(db, get_users, skip, limit, after=decode_cursor(after))
+    set_next_cursor(response, users, limit)
+    return users
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user_by_id(user_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_user_by_id(user_id: int, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_user), fields: Optional[tuple] = Depends(fields_param(UserResponse))):
 
-    user = get_user(db, user_id)
+    user = await run_db(db, get_user, user_id, columns=response_columns(fields) if fields else None)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return user
+    return ORJSONResponse(user._asdict()) if fields else user
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user_by_id(user_id: int, user: UserUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def update_user_by_id(user_id: int, user: UserUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
 
-    updated_user = update_user(db, user_id, user)
+    hashed_password = await hash_password_async(user.contrasenia) if user.contrasenia is not None else None
+    updated_user = await run_db(db, update_user, user_id, user, hashed_password=hashed_password)
     if not updated_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return updated_user
 
 @router.delete("/{user_id}", response_model=UserResponse)
-def delete_user_by_id(user_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def delete_user_by_id(user_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
  
-    deleted_user = delete_user(db, user_id)
+    deleted_user = await run_db(db, delete_user, user_id)
     if not deleted_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return deleted_user
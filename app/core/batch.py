@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, SessionLocal, shared_session
+
+logger = logging.getLogger(__name__)
+
+# Operations that never finish or would recurse.
+EXCLUDED_PATHS = ("/batch", "/tasks/stream", "/tasks/ws")
+# Request headers every operation inherits from the batch itself.
+FORWARDED_HEADERS = (b"authorization", b"cookie", b"accept-language", b"user-agent")
+
+
+def is_excluded(path: str) -> bool:
+    path = path.partition("?")[0].rstrip("/")
+    return any(path == excluded or path.startswith(excluded + "/") for excluded in EXCLUDED_PATHS)
+
+
+async def call_operation(app, parent_scope: dict, index: int, operation, inherited: list) -> dict:
+    """Run one operation through the whole ASGI app, in-process, and capture its response."""
+    path, _, query = operation.path.partition("?")
+    body = b"" if operation.body is None else orjson.dumps(operation.body)
+    headers = list(inherited)
+    for name, value in operation.headers.items():
+        # The batch's credentials are the only ones that apply.
+        if name.lower() not in ("authorization", "content-length", "content-type"):
+            headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+    if operation.body is not None:
+        headers.append((b"content-type", b"application/json"))
+    headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": operation.method,
+        "scheme": parent_scope.get("scheme", "http"),
+        "server": parent_scope.get("server"),
+        "client": parent_scope.get("client"),
+        "root_path": parent_scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+    }
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Never disconnects: a streaming response must not be cut short.
+        await asyncio.Future()
+
+    status, response_headers, chunks = 500, [], []
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status, response_headers = message["status"], message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        logger.exception("Batch operation %d (%s %s) failed", index, operation.method, operation.path)
+        status, response_headers, chunks = 500, [], [b'{"detail":"Error interno"}']
+
+    decoded = {name.decode("latin-1"): value.decode("latin-1") for name, value in response_headers if name != b"content-length"}
+    raw = b"".join(chunks)
+    if not raw:
+        content = None
+    elif decoded.get("content-type", "").startswith("application/json"):
+        content = orjson.loads(raw)
+    else:
+        content = raw.decode(errors="replace")
+    return {"index": index, "status": status, "headers": decoded, "body": content}
+
+
+async def _rollback(db):
+    if isinstance(db, AsyncSession):
+        await db.rollback()
+    else:
+        await run_in_threadpool(db.rollback)
+
+
+async def _close(db):
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+async def run_batch(app, parent_scope: dict, operations: list, inherited: list) -> list:
+    """Execute operations in order and return their results in the same order.
+
+    Operations run one at a time on a single primary session shared through
+    shared_session, so later reads see earlier writes. Before the first
+    write, a run of consecutive GETs is gathered concurrently instead; a
+    session cannot be used concurrently, so each of those checks out its own
+    (possibly replica) session.
+    """
+    results = [None] * len(operations)
+    db = AsyncSessionLocal() if settings.DB_ASYNC else SessionLocal()
+    wrote = False
+    index = 0
+    try:
+        while index < len(operations):
+            end = index
+            if settings.BATCH_CONCURRENT_READS and not wrote:
+                while end < len(operations) and operations[end].method == "GET":
+                    end += 1
+            if end - index > 1:
+                results[index:end] = await asyncio.gather(*(
+                    call_operation(app, parent_scope, position, operations[position], inherited)
+                    for position in range(index, end)
+                ))
+                index = end
+                continue
+
+            operation = operations[index]
+            token = shared_session.set(db)
+            try:
+                results[index] = await call_operation(app, parent_scope, index, operation, inherited)
+            finally:
+                shared_session.reset(token)
+            if results[index]["status"] >= 400:
+                # Whatever the failed operation left in the session must not leak into the next one.
+                await _rollback(db)
+            wrote = wrote or operation.method != "GET"
+            index += 1
+    finally:
+        await _close(db)
+    return results
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Optional
+import orjson
+from sqlalchemy import Text, bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.schemas.task import TaskResponse
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "task_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+NOTIFY_PAYLOAD_BYTES = 7900
+# One round trip per transaction, whatever the number of payloads.
+NOTIFY_STATEMENT = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+).bindparams(bindparam("payloads", type_=ARRAY(Text)))
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+# Sent instead of the backlog when a subscriber falls behind: refetch GET /tasks/.
+RESYNC = {"type": "resync"}
+
+EVENTS_DELIVERED = Counter("task_events_delivered_total", "Task events queued for subscribers.")
+EVENTS_RESYNCS = Counter("task_events_resyncs_total", "Subscriber queues that overflowed and were reset to a resync event.")
+SUBSCRIBERS = Gauge("task_event_subscribers", "Open task event subscriptions.")
+
+
+class Subscription:
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+            EVENTS_DELIVERED.inc()
+        except asyncio.QueueFull:
+            # Never grow past maxsize: drop the backlog and ask for a refetch.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({**RESYNC, "user_id": self.user_id})
+            EVENTS_RESYNCS.inc()
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """In-process fan-out of task events to the owning user's subscribers.
+
+    publish() is thread-safe; delivery always happens on the event loop.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._subscribers = defaultdict(set)
+        self._listeners = []
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def add_listener(self, callback):
+        """Call callback(message) on the loop for every event, whatever the user."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, settings.EVENTS_QUEUE_SIZE)
+        self._subscribers[user_id].add(subscription)
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers and subscription in subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+            SUBSCRIBERS.dec()
+
+    def publish(self, message: dict):
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def resync_all(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._resync_all)
+
+    def _dispatch(self, message: dict):
+        for callback in list(self._listeners):
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("Task event listener failed")
+        for subscription in list(self._subscribers.get(message["user_id"], ())):
+            subscription.offer(message)
+
+    def _resync_all(self):
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.offer({**RESYNC, "user_id": subscription.user_id})
+
+
+broadcaster = Broadcaster()
+
+
+def _task_message(kind: str, row) -> dict:
+    return {
+        "type": kind,
+        "user_id": row.user_id,
+        "task": {field: getattr(row, field) for field in TASK_FIELDS},
+    }
+
+
+def encode_event(message: dict) -> str:
+    return orjson.dumps(message).decode()
+
+
+def task_changed(db: Session, kind: str, rows):
+    """Announce created/updated/deleted tasks once the session commits.
+
+    The events wait in the session. With EVENTS_PG_NOTIFY they go out
+    through pg_notify just before the commit, in the same transaction, so
+    Postgres delivers them to every worker only if it commits. Otherwise
+    they reach local subscribers after it.
+    """
+    _queue(db, [_task_message(kind, row) for row in rows])
+
+
+def tasks_resynced(db: Session, user_ids):
+    """For writes too large to describe row by row (imports): ask for a refetch."""
+    _queue(db, [{**RESYNC, "user_id": user_id} for user_id in user_ids])
+
+
+def _queue(db: Session, messages: list):
+    if messages:
+        db.info.setdefault("task_events", []).extend(messages)
+
+
+def notify_payloads(messages: list) -> list:
+    """Pack messages into JSON arrays that each fit in one NOTIFY payload."""
+    payloads, chunk, size = [], [], 2
+    for message in messages:
+        encoded = orjson.dumps(message)
+        if len(encoded) + 2 > NOTIFY_PAYLOAD_BYTES:
+            encoded = orjson.dumps({**RESYNC, "user_id": message["user_id"]})
+        if chunk and size + len(encoded) + 1 > NOTIFY_PAYLOAD_BYTES:
+            payloads.append(b"[" + b",".join(chunk) + b"]")
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        payloads.append(b"[" + b",".join(chunk) + b"]")
+    return [payload.decode() for payload in payloads]
+
+
+def publish_events(messages: list):
+    """Publish events produced outside a task write (e.g. by background jobs).
+
+    Blocking when EVENTS_PG_NOTIFY is on: call it from a worker thread.
+    """
+    if not messages:
+        return
+    if settings.EVENTS_PG_NOTIFY:
+        from app.db.database import SessionLocal
+
+        with SessionLocal() as db:
+            _queue(db, messages)
+            db.commit()
+    else:
+        for message in messages:
+            broadcaster.publish(message)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session):
+    if not settings.EVENTS_PG_NOTIFY:
+        return
+    messages = session.info.pop("task_events", None)
+    if messages:
+        session.execute(NOTIFY_STATEMENT, {"channel": NOTIFY_CHANNEL, "payloads": notify_payloads(messages)})
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    for message in session.info.pop("task_events", ()):
+        broadcaster.publish(message)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session, transaction):
+    # Runs after after_commit, so anything left here was rolled back.
+    if transaction.parent is None:
+        session.info.pop("task_events", None)
+
+
+_listener = None
+
+
+def start_events():
+    global _listener
+    broadcaster.attach(asyncio.get_running_loop())
+    if settings.EVENTS_PG_NOTIFY and _listener is None:
+        # Only loaded where it is used: most deployments never LISTEN.
+        from app.core.pg_listener import PostgresListener
+        from app.db.database import engine
+
+        _listener = PostgresListener(engine)
+        _listener.start()
+
+
+def stop_events():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
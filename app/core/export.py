@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(dict(row._mapping), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _csv_chunk(rows, header=None) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header is not None:
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+    return buffer.getvalue()
+
+
+async def encode_export(partitions: AsyncIterator, format: str, columns: list[str]):
+    """Encode each batch of rows as soon as it arrives; one chunk per batch."""
+    if format == "csv":
+        # The header goes out before the query returns its first batch.
+        yield _csv_chunk((), header=columns)
+        async for rows in partitions:
+            yield _csv_chunk(rows)
+    else:
+        async for rows in partitions:
+            yield _ndjson_chunk(rows)
@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import parse_qs
+from jose import JWTError
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.security import decode_access_token
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+# Added per request by CORSMiddleware for the caller's Origin; never replayed.
+UNSTORED_HEADER_PREFIXES = (b"access-control-", b"vary")
+MAX_KEY_LENGTH = 255
+# A pending claim older than this belongs to a worker that died mid-request.
+PENDING_TIMEOUT_SECONDS = 300
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total", "Writes carrying an Idempotency-Key by outcome.", ("outcome",)
+)
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class MemoryIdempotencyStore:
+    """Per-worker LRU of first responses; claims always succeed locally."""
+
+    def __init__(self):
+        self.cache = TTLCache(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_SECONDS)
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        return self.cache.get(key)
+
+    async def claim(self, key: str, fingerprint: str) -> bool:
+        return True
+
+    async def save(self, key: str, response: StoredResponse):
+        self.cache.set(key, response)
+
+    async def release(self, key: str):
+        pass
+
+
+class DatabaseIdempotencyStore(MemoryIdempotencyStore):
+    """LRU in front of the idempotency_keys table, so retries may land on any worker."""
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        response = self.cache.get(key)
+        if response is None:
+            response = await run_in_threadpool(self._load, key)
+            if response is not None:
+                self.cache.set(key, response)
+        return response
+
+    async def claim(self, key: str, fingerprint: str) -> bool:
+        return await run_in_threadpool(self._claim, key, fingerprint)
+
+    async def save(self, key: str, response: StoredResponse):
+        self.cache.set(key, response)
+        await run_in_threadpool(self._save, key, response)
+
+    async def release(self, key: str):
+        await run_in_threadpool(self._release, key)
+
+    @staticmethod
+    def _cutoff() -> datetime:
+        return datetime.now() - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+    def _load(self, key: str) -> Optional[StoredResponse]:
+        from app.db.database import SessionLocal
+        from app.models.idempotency_key import IdempotencyKey
+
+        with SessionLocal() as db:
+            row = db.execute(
+                select(IdempotencyKey.fingerprint, IdempotencyKey.status, IdempotencyKey.headers, IdempotencyKey.body)
+                .where(IdempotencyKey.key == key, IdempotencyKey.status.is_not(None), IdempotencyKey.created_at >= self._cutoff())
+            ).first()
+        if row is None:
+            return None
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.headers)]
+        return StoredResponse(row.fingerprint, row.status, headers, row.body)
+
+    def _claim(self, key: str, fingerprint: str) -> bool:
+        from app.db.database import SessionLocal
+        from app.models.idempotency_key import IdempotencyKey
+
+        with SessionLocal() as db:
+            # Expired keys are reusable; the primary key makes concurrent claims race safely.
+            abandoned = datetime.now() - timedelta(seconds=PENDING_TIMEOUT_SECONDS)
+            db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key,
+                    or_(
+                        IdempotencyKey.created_at < self._cutoff(),
+                        and_(IdempotencyKey.status.is_(None), IdempotencyKey.created_at < abandoned),
+                    ),
+                )
+            )
+            db.add(IdempotencyKey(key=key, fingerprint=fingerprint, created_at=datetime.now()))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return False
+        return True
+
+    def _save(self, key: str, response: StoredResponse):
+        from app.db.database import SessionLocal
+        from app.models.idempotency_key import IdempotencyKey
+
+        headers = json.dumps([(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.headers])
+        with SessionLocal() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status=response.status, headers=headers, body=response.body)
+            )
+            db.commit()
+
+    def _release(self, key: str):
+        from app.db.database import SessionLocal
+        from app.models.idempotency_key import IdempotencyKey
+
+        with SessionLocal() as db:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status.is_(None)))
+            db.commit()
+
+
+def _principal(scope) -> str:
+    """Who is writing: the bearer token's subject and the user_id query parameter."""
+    parts = []
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            parts.append(f"sub={decode_access_token(token).get('sub')}")
+        except JWTError:
+            # Still scoped to the caller; the endpoint decides whether it is authorized.
+            parts.append(f"token={hashlib.sha256(token.encode()).hexdigest()}")
+    user_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("user_id")
+    if user_id:
+        parts.append(f"user_id={user_id[-1]}")
+    return ",".join(parts) or "anonymous"
+
+
+def _plain_response(status: int, detail: str, headers: tuple = ()) -> tuple:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    return status, [(b"content-type", b"application/json"), *headers], body
+
+
+class IdempotencyMiddleware:
+    """Replays the first response to a write retried with the same Idempotency-Key.
+
+    Keys are scoped to the caller (_principal), method and path, and a reused
+    key with a different body or query string is rejected with 422.
+    Duplicates that arrive while the first request is still running wait for
+    its result in this worker.
+    With the database store, a duplicate running on another worker gets 409
+    and Retry-After instead. 5xx responses are not stored, so those can be
+    retried.
+    """
+
+    METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+    def __init__(self, app, prefixes=("/tasks", "/categories")):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.store = DatabaseIdempotencyStore() if settings.IDEMPOTENCY_DB else MemoryIdempotencyStore()
+        self._inflight = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.METHODS or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = dict(scope["headers"]).get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await self._send(send, *_plain_response(400, "Idempotency-Key inválida"))
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send(send, *_plain_response(413, "Cuerpo demasiado grande para usar Idempotency-Key"))
+            return
+        key = f"{_principal(scope)} {scope['method']} {scope['path']} {idempotency_key.decode('latin-1')}"
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\0" + body).hexdigest()
+
+        while True:
+            stored = await self.store.get(key)
+            if stored is not None:
+                await self._replay(send, stored, fingerprint)
+                return
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            # Coalesce: wait for the in-flight original, then read its result.
+            await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[key] = pending
+        try:
+            if not await self.store.claim(key, fingerprint):
+                IDEMPOTENCY_REQUESTS.inc("conflict")
+                await self._send(send, *_plain_response(409, "Solicitud con esta Idempotency-Key en curso", ((b"retry-after", b"1"),)))
+                return
+            await self._execute(scope, body, send, key, fingerprint)
+        finally:
+            del self._inflight[key]
+            pending.set_result(None)
+
+    async def _read_body(self, receive) -> Optional[bytes]:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _execute(self, scope, body: bytes, send, key: str, fingerprint: str):
+        delivered = False
+        status, headers, parts = 500, [], []
+
+        async def replay_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                parts.append(message.get("body", b""))
+            await send(message)
+
+        saved = False
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if status < 500:
+                IDEMPOTENCY_REQUESTS.inc("stored")
+                headers = [(name, value) for name, value in headers if not name.lower().startswith(UNSTORED_HEADER_PREFIXES)]
+                await self.store.save(key, StoredResponse(fingerprint, status, headers, b"".join(parts)))
+                saved = True
+        finally:
+            if not saved:
+                # Also when the request is cancelled (client gone): a claim
+                # left pending would answer every retry with 409.
+                await asyncio.shield(self.store.release(key))
+
+    async def _replay(self, send, stored: StoredResponse, fingerprint: str):
+        if stored.fingerprint != fingerprint:
+            IDEMPOTENCY_REQUESTS.inc("mismatch")
+            await self._send(send, *_plain_response(422, "Idempotency-Key reutilizada con otra solicitud"))
+            return
+        IDEMPOTENCY_REQUESTS.inc("replayed")
+        await self._send(send, stored.status, [*stored.headers, REPLAYED_HEADER], stored.body)
+
+    @staticmethod
+    async def _send(send, status: int, headers: list, body: bytes):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds), Prometheus style."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "avg": self.sum / self.count if self.count else 0.0,
+                "buckets": dict(zip(self.buckets, self.counts)),
+            }
+
+    def samples(self, name: str, labels: dict):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        for bound, bucket_count in zip(self.buckets, counts):
+            yield f"{name}_bucket", {**labels, "le": _format_value(bound)}, bucket_count
+        yield f"{name}_bucket", {**labels, "le": "+Inf"}, count
+        yield f"{name}_sum", labels, total
+        yield f"{name}_count", labels, count
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _labels(self, labelvalues) -> dict:
+        return dict(zip(self.labelnames, labelvalues))
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, self._labels(labelvalues), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value: float):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class LabeledHistogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = buckets
+
+    def observe(self, *labelvalues, value: float):
+        histogram = self._values.get(labelvalues)
+        if histogram is None:
+            with self._lock:
+                histogram = self._values.setdefault(labelvalues, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = list(self._values.items())
+        return {",".join(labelvalues): histogram.snapshot() for labelvalues, histogram in items}
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, histogram in items:
+            yield from histogram.samples(self.name, self._labels(labelvalues))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def add_collector(self, collector):
+        """collector() returns (name, type, documentation, [(labels, value), ...]) tuples."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(_header(metric.name, metric.type, metric.documentation))
+            lines.extend(_sample_line(name, labels, value) for name, labels, value in metric.samples())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.extend(_header(name, metric_type, documentation))
+                lines.extend(_sample_line(name, labels, value) for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+def _header(name: str, metric_type: str, documentation: str):
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample_line(name: str, labels: dict, value) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+        return f"{name}{{{rendered}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+REGISTRY = Registry()
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+REQUEST_LATENCY = LabeledHistogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served.", ("method",))
+REQUEST_QUERIES = LabeledHistogram(
+    "http_request_db_queries", "SQL statements issued per request.", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = LabeledHistogram("http_request_db_seconds", "Time spent in SQL per request.", ("method", "route"))
+
+
+class MetricsMiddleware:
+    """Records latency, status, in-flight and SQL counters for every HTTP request.
+
+    Also returns the statement count in an X-SQL-Count header and, when
+    SLOW_REQUEST_MS is set, logs slow requests with the SQL they issued.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Imported lazily: the password-hash worker processes import this module
+        # and should not build database engines.
+        from app.db.database import query_stats, QueryStats
+
+        method = scope["method"]
+        stats = QueryStats(record_statements=settings.SLOW_REQUEST_MS > 0)
+        token = query_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-count", str(stats.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        IN_PROGRESS.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_PROGRESS.dec(method)
+            query_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Label by route template, never the raw path, to bound cardinality.
+            route_path = getattr(route, "path", "unmatched")
+            REQUESTS.inc(method, route_path, str(status))
+            REQUEST_LATENCY.observe(method, route_path, value=elapsed)
+            REQUEST_QUERIES.observe(method, route_path, value=stats.count)
+            REQUEST_DB_TIME.observe(method, route_path, value=stats.duration)
+            if settings.SLOW_REQUEST_MS > 0 and elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                logger.warning(
+                    "Slow request %s %s -> %s in %.1fms (%d queries, %.1fms in DB)\n%s",
+                    method, scope["path"], status, elapsed * 1000, stats.count, stats.duration * 1000,
+                    "\n".join(stats.statements or [])
+                )
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,57 @@
+import logging
+import select
+import threading
+import orjson
+from app.core.events import NOTIFY_CHANNEL, broadcaster
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresListener:
+    """LISTEN on NOTIFY_CHANNEL in a thread and feed the local broadcaster."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="task-events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _connect(self):
+        args, kwargs = self.engine.dialect.create_connect_args(self.engine.url)
+        connection = self.engine.dialect.loaded_dbapi.connect(*args, **kwargs)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return connection
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                connection = self._connect()
+            except Exception:
+                logger.exception("Task events listener could not connect; retrying")
+                self._stop.wait(5)
+                continue
+            try:
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            payload = orjson.loads(connection.notifies.pop(0).payload)
+                            # A list per transaction; a bare message from a worker not yet upgraded.
+                            for message in payload if isinstance(payload, list) else (payload,):
+                                broadcaster.publish(message)
+            except Exception:
+                logger.exception("Task events listener lost its connection; reconnecting")
+                # Events sent while disconnected are gone; tell everyone to refetch.
+                broadcaster.resync_all()
+            finally:
+                connection.close()
@@ -1,27 +1,132 @@
 from passlib.context import CryptContext
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-import os
-from dotenv import load_dotenv
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import LabeledHistogram
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS
+)
 
-SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# token -> decoded JWT payload, and (username, token) -> resolved principal.
+token_cache = TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Set by POST /batch: its operations run as the principal that authenticated the batch.
+batch_principal: ContextVar = ContextVar("batch_principal", default=None)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# bcrypt runs in its own process pool so a login burst cannot starve the
+# request threadpool. The semaphore bounds running + queued operations.
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE)
+hash_latency = LabeledHistogram(
+    "password_hash_duration_seconds",
+    "Password hash/verify latency including pool queueing.",
+    ("operation",)
+)
+hash_rejections = 0
+
+def _get_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_executor
+
+def _discard_hash_executor(broken: ProcessPoolExecutor):
+    # Only the broken instance: another request may already have replaced it.
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is broken:
+            _hash_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+async def _run_hash_operation(operation: str, fn, *args):
+    global hash_rejections
+    if not _hash_slots.acquire(blocking=False):
+        hash_rejections += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, intente de nuevo",
+            headers={"Retry-After": "1"}
+        )
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        # A worker that died (OOM kill, segfault) breaks the whole pool; rebuild
+        # it and retry once, hashing is side-effect free.
+        for _ in range(2):
+            executor = _get_hash_executor()
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                logger.warning("Password hash pool broken; restarting it", exc_info=True)
+                _discard_hash_executor(executor)
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, intente de nuevo",
+            headers={"Retry-After": "1"}
+        )
+    finally:
+        _hash_slots.release()
+        hash_latency.observe(operation, value=time.perf_counter() - start)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash_operation("hash", get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash needs an upgrade."""
+    return await _run_hash_operation("verify", verify_and_update_password, plain_password, hashed_password)
+
+def hash_pool_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "queue_size": settings.PASSWORD_HASH_QUEUE_SIZE,
+        "rejections": hash_rejections,
+        "latency_seconds": hash_latency.snapshot(),
+    }
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -29,4 +134,21 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_access_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.set(token, payload, ttl=token_ttl(payload))
+    return payload
+
+def token_ttl(payload: dict) -> float:
+    # Never keep a token (or what it resolved to) past its own expiry.
+    exp = payload.get("exp")
+    if exp is None:
+        return settings.PRINCIPAL_CACHE_TTL_SECONDS
+    return exp - time.time()
+
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate_where(lambda key, principal: principal.id == user_id)
@@ -0,0 +1,45 @@
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+
+
+def schema_columns(schema, model, fields: Optional[tuple] = None) -> tuple:
+    """Model columns backing each field of a response schema, in field order.
+
+    Selecting exactly these keeps the JSON keys in the order FastAPI would
+    emit them when serializing through the schema. fields narrows the
+    selection to a sparse fieldset from fields_param.
+    """
+    return tuple(getattr(model, name) for name in (fields or schema.model_fields))
+
+
+def fields_param(schema):
+    """Dependency for ?fields=a,b: the requested schema fields in schema order, or None for all.
+
+    id is always included; it is what the pagination cursor and ETags key on.
+    """
+    def dependency(fields: Optional[str] = None) -> Optional[tuple]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(schema.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Campos no soportados: {', '.join(sorted(unknown))}")
+        requested.add("id")
+        return tuple(name for name in schema.model_fields if name in requested)
+
+    return dependency
+
+
+def project(row: dict, fields: Optional[tuple]) -> dict:
+    return row if fields is None else {name: row[name] for name in fields}
+
+
+def json_rows(rows) -> ORJSONResponse:
+    """Encode column rows straight to JSON, skipping Pydantic validation.
+
+    Only for rows selected with schema_columns: they come from the database
+    already shaped like the schema, and orjson writes datetimes, enums and
+    non-ASCII text exactly as FastAPI's default JSONResponse does.
+    """
+    return ORJSONResponse([row if isinstance(row, dict) else row._asdict() for row in rows])
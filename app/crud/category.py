@@ -1,45 +1,177 @@
+import bisect
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+from sqlalchemy import insert, update, delete
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.etag import make_etag
+from app.core.events import task_changed
+from app.crud.task_stats import task_deltas, apply_task_deltas
+from app.models.archived_task import ArchivedTask
 from app.models.category import Category
-from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.models.task import Task
+from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
+
+
+class CategoryCache:
+    """Process-local snapshot of the categories table.
+
+    Local writes bump ``version`` so the next read reloads; writes made by
+    other workers are picked up after CATEGORY_CACHE_TTL_SECONDS, and ids
+    missing from the snapshot are always re-checked against the database.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._loaded_version = None
+        self._loaded_at = 0.0
+        self.items = []
+        self.rows = []
+        self.ids = []
+        self.by_id = {}
+        self.etags = {}
+        self.etag = None
+
+    def _fresh(self) -> bool:
+        return (
+            self._loaded_version == self.version
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def load(self, db: Session):
+        if self._fresh():
+            self.hits += 1
+            return self
+        self.misses += 1
+        version = self.version
+        # Never query under the lock: with DB_ASYNC this runs in a greenlet on
+        # the event loop thread, and a second miss blocking on the lock there
+        # would stop the loop that has to finish the first query. Concurrent
+        # misses each load; the lock only keeps the swap consistent.
+        rows = db.query(Category).order_by(Category.id).all()
+        items = [CategoryResponse.model_validate(row, from_attributes=True) for row in rows]
+        etags = {item.id: make_etag("category", item.model_dump()) for item in items}
+        with self._lock:
+            if self._loaded_version is not None and self._loaded_version > version:
+                # A load that started after a newer write already swapped in.
+                return self
+            self.etags = etags
+            self.by_id = {item.id: item for item in items}
+            self.ids = [item.id for item in items]
+            self.items = items
+            self.rows = [item.model_dump() for item in items]
+            self.etag = make_etag("categories", tuple(etags.values()))
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+        return self
+
+    def invalidate(self):
+        self.version += 1
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "size": len(self.items),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+category_cache = CategoryCache(settings.CATEGORY_CACHE_TTL_SECONDS)
 
 
 def create_category(db: Session, category: CategoryCreate):
-    db_category = Category(
-        nombre=category.nombre,
-        descripcion=category.descripcion
+    db_category = db.scalar(
+        insert(Category).values(
+            nombre=category.nombre,
+            descripcion=category.descripcion
+        ).returning(Category)
     )
-    db.add(db_category)
     db.commit()
-    db.refresh(db_category)
+    category_cache.invalidate()
     return db_category
 
 
 def get_category(db: Session, category_id: int):
+    cached = category_cache.load(db).by_id.get(category_id)
+    if cached is not None:
+        return cached
+    # Possibly created by another worker since our snapshot was taken.
     return db.query(Category).filter(Category.id == category_id).first()
 
 
-def get_categories(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Category).offset(skip).limit(limit).all()
+def get_category_etag(db: Session, category_id: int) -> Optional[str]:
+    return category_cache.load(db).etags.get(category_id)
 
-def update_category(db: Session, category_id: int, category: CategoryUpdate):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if not db_category:
-        return None
 
+def get_categories(db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None, as_rows: bool = False):
+    cache = category_cache.load(db)
+    if after is not None:
+        start = bisect.bisect_right(cache.ids, after)
+    else:
+        start = skip
+    # as_rows returns the snapshot's plain dicts for the fast JSON path.
+    return (cache.rows if as_rows else cache.items)[start:start + limit]
+
+
+def get_categories_etag(db: Session) -> str:
+    return category_cache.load(db).etag
+
+
+def existing_category_ids(db: Session, category_ids: set) -> set:
+    known = category_cache.load(db).by_id
+    found = {category_id for category_id in category_ids if category_id in known}
+    missing = set(category_ids) - found
+    if missing:
+        found.update(row.id for row in db.query(Category.id).filter(Category.id.in_(missing)))
+    return found
+
+def update_category(db: Session, category_id: int, category: CategoryUpdate):
+    values = {}
     if category.nombre is not None:
-        db_category.nombre = category.nombre
+        values["nombre"] = category.nombre
     if category.descripcion is not None:
-        db_category.descripcion = category.descripcion
+        values["descripcion"] = category.descripcion
+    if not values:
+        return db.query(Category).filter(Category.id == category_id).first()
+
+    db_category = db.scalar(
+        update(Category).where(Category.id == category_id).values(**values).returning(Category)
+    )
+    if not db_category:
+        return None
 
     db.commit()
-    db.refresh(db_category)
+    category_cache.invalidate()
     return db_category
 
 def delete_category(db: Session, category_id: int):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    # Like the ORM delete this replaced, tasks outlive their category with
+    # category_id NULL; the foreign key would reject the DELETE otherwise.
+    table = Task.__table__
+    detached = db.execute(
+        update(table).where(table.c.category_id == category_id).values(category_id=None).returning(*table.c)
+    ).all()
+    archived = db.execute(
+        update(ArchivedTask).where(ArchivedTask.category_id == category_id).values(category_id=None)
+        .returning(ArchivedTask.user_id, ArchivedTask.estado, ArchivedTask.category_id)
+    ).all()
+    db_category = db.scalar(delete(Category).where(Category.id == category_id).returning(Category))
     if not db_category:
+        db.rollback()
         return None
 
-    db.delete(db_category)
+    moved = [*detached, *archived]
+    previous = [SimpleNamespace(user_id=row.user_id, estado=row.estado, category_id=category_id) for row in moved]
+    apply_task_deltas(db, task_deltas(moved, deltas=task_deltas(previous, -1)))
+    task_changed(db, "updated", detached)
+
     db.commit()
+    category_cache.invalidate()
     return db_category
@@ -1,64 +1,474 @@
-from sqlalchemy.orm import Session
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from sqlalchemy import select, insert, update, delete, func, text, union_all, Integer
+from sqlalchemy.orm import Session, load_only, selectinload
+from app.models.task import Task, FTS_CONFIG, texto_tsvector
+from app.models.archived_task import ArchivedTask
 from app.models.category import Category
+from app.models.user import User
+from app.models.task_counter import TaskCounter
+from app.schemas.task import TaskCreate, TaskUpdate, TaskBulkUpdate, TaskBulkResult, TaskResponse, TaskFilters
+from app.crud.category import existing_category_ids
+from app.crud.task_stats import VERSION, task_deltas, version_deltas, apply_task_deltas
+from app.core.serialization import schema_columns
+from app.core.events import task_changed, tasks_resynced
 from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+import io
+import logging
 from fastapi import HTTPException
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
 
 
 def create_task(db: Session, task: TaskCreate, user_id: int):
 
-    category = db.query(Category).filter(Category.id == task.category_id).first()
-    if not category:
+    if not existing_category_ids(db, {task.category_id}):
         raise HTTPException(status_code=400, detail="Categoria no encontrada")
 
-    db_task = Task(
-        texto=task.texto,
-        fecha_creacion=datetime.now(),
-        fecha_tentiva_finalizacion=task.fecha_tentiva_finalizacion,
-        estado=task.estado,
-        user_id=user_id,
-        category_id=task.category_id
+    db_task = db.scalar(
+        insert(Task).values(
+            texto=task.texto,
+            fecha_creacion=datetime.now(),
+            fecha_tentiva_finalizacion=task.fecha_tentiva_finalizacion,
+            estado=task.estado,
+            user_id=user_id,
+            category_id=task.category_id
+        ).returning(Task)
     )
-    db.add(db_task)
+    apply_task_deltas(db, task_deltas([db_task]))
+    task_changed(db, "created", [db_task])
     db.commit()
-    db.refresh(db_task)
     return db_task
 
 
-def get_task(db: Session, task_id: int):
-    return db.query(Task).filter(Task.id == task_id).first()
+# ?expand= names and the model behind each relationship.
+TASK_EXPANSIONS = {"category": Category, "user": User}
+
+
+def _expand_options(model, expand):
+    # One extra SELECT ... WHERE id IN (...) per relation, whatever the page size.
+    return [selectinload(getattr(model, name)) for name in expand]
+
+
+def _load_options(model, expand, fields):
+    options = _expand_options(model, expand)
+    if fields:
+        # The foreign keys stay loaded: selectinload needs them to find the related rows.
+        keys = {*fields, *(f"{name}_id" for name in expand)}
+        options.append(load_only(*(getattr(model, name) for name in keys)))
+    return options
+
+
+def get_task(db: Session, task_id: int, include_archived: bool = False, expand=(), fields=None):
+    # fields selects only those columns; the other attributes are left unloaded.
+    task = db.query(Task).options(*_load_options(Task, expand, fields)).filter(Task.id == task_id).first()
+    if task is None and include_archived:
+        task = db.query(ArchivedTask).options(*_load_options(ArchivedTask, expand, fields)).filter(ArchivedTask.id == task_id).first()
+    return task
+
+
+def get_task_with_version(db: Session, task_id: int, include_archived: bool = False, fields=None):
+    """(task columns as a dict, owner id, owner's task version), or None if the task does not exist.
+
+    One statement serves both the ETag check and the body. With
+    include_archived a miss falls back to the archive.
+    """
+    models = (Task, ArchivedTask) if include_archived else (Task,)
+    for model in models:
+        columns = schema_columns(TaskResponse, model, fields)
+        row = db.execute(
+            select(model.user_id, TaskCounter.count, *columns)
+            .select_from(model)
+            .outerjoin(
+                TaskCounter,
+                (TaskCounter.user_id == model.user_id)
+                & (TaskCounter.dimension == VERSION)
+                & (TaskCounter.key == ""),
+            )
+            .where(model.id == task_id)
+        ).first()
+        if row is not None:
+            owner, version, *values = row
+            return dict(zip((column.key for column in columns), values)), owner, version or 0
+    return None
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input is never parsed as FTS5 query syntax.
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+
+
+# Databases (by URL) known to have tasks_fts; only a hit is remembered.
+_fts_databases = set()
+
+
+def _has_sqlite_fts(db: Session) -> bool:
+    url = str(db.get_bind().url)
+    if url in _fts_databases:
+        return True
+    if db.scalar(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")):
+        _fts_databases.add(url)
+        return True
+    # Not migrated yet (DB_AUTO_MIGRATE=false): search still works, just unindexed.
+    logger.warning("tasks_fts is missing; ?q= falls back to a substring scan until migrations run")
+    return False
+
+
+def _texto_matches(db: Session, q: str, model=Task):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return texto_tsvector(model.texto).op("@@")(func.plainto_tsquery(FTS_CONFIG, q))
+    if dialect == "sqlite" and model is Task and _has_sqlite_fts(db):
+        matches = text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH :fts_query")
+        return Task.id.in_(matches.bindparams(fts_query=_fts5_query(q)).columns(rowid=Integer))
+    # The SQLite archive has no FTS table; it is cold, a substring scan will do.
+    return model.texto.ilike(f"%{q}%")
+
+
+def apply_task_filters(db: Session, query, filters: Optional[TaskFilters], model=Task):
+    if filters is None:
+        return query
+    if filters.estado is not None:
+        query = query.filter(model.estado == filters.estado)
+    if filters.category_id is not None:
+        query = query.filter(model.category_id == filters.category_id)
+    if filters.fecha_tentiva_desde is not None:
+        query = query.filter(model.fecha_tentiva_finalizacion >= filters.fecha_tentiva_desde)
+    if filters.fecha_tentiva_hasta is not None:
+        query = query.filter(model.fecha_tentiva_finalizacion <= filters.fecha_tentiva_hasta)
+    if filters.q and filters.q.strip():
+        query = query.filter(_texto_matches(db, filters.q.strip(), model))
+    return query
+
 
+RESPONSE_COLUMNS = schema_columns(TaskResponse, Task)
 
-def get_tasks(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(Task).filter(Task.user_id == user_id).offset(skip).limit(limit).all()
+
+def response_columns(fields=None) -> tuple:
+    return schema_columns(TaskResponse, Task, fields) if fields else RESPONSE_COLUMNS
+
+
+def get_tasks(db: Session, user_id: int, skip: int = 0, limit: int = 100, after: Optional[int] = None, filters: Optional[TaskFilters] = None, columns=None, include_archived: bool = False, expand=()):
+    # columns returns plain rows (e.g. RESPONSE_COLUMNS for the fast JSON path);
+    # expand always returns objects with the requested relations loaded.
+    if include_archived:
+        names = [column.key for column in columns] if columns else list(TaskResponse.model_fields)
+        names += [f"{name}_id" for name in expand if f"{name}_id" not in names]
+        rows = _get_tasks_with_archive(db, user_id, skip, limit, after, filters, names)
+        return _attach_related(db, rows, expand) if expand else rows
+    if expand:
+        query = db.query(Task).options(*_load_options(Task, expand, [column.key for column in columns or ()]))
+    else:
+        query = db.query(*columns) if columns else db.query(Task)
+    query = apply_task_filters(db, query.filter(Task.user_id == user_id), filters)
+    if after is not None:
+        # Keyset page: served straight from the (user_id, id) index.
+        query = query.filter(Task.id > after)
+    elif skip:
+        query = query.offset(skip)
+    return query.order_by(Task.id).limit(limit).all()
+
+
+def _get_tasks_with_archive(db: Session, user_id: int, skip: int, limit: int, after: Optional[int], filters: Optional[TaskFilters], names):
+    """Hot and archived tasks merged by id, as rows of the named columns.
+
+    Each side is limited to skip + limit rows from its (user_id, id) index
+    before the merge, so the archive is never scanned past the page.
+    """
+    def side(model):
+        stmt = select(*(getattr(model, name) for name in names)).where(model.user_id == user_id)
+        stmt = apply_task_filters(db, stmt, filters, model)
+        if after is not None:
+            stmt = stmt.where(model.id > after)
+        return stmt.order_by(model.id).limit(skip + limit)
+
+    merged = union_all(side(Task).subquery().select(), side(ArchivedTask).subquery().select()).subquery("merged")
+    stmt = select(merged).order_by(merged.c.id).limit(limit)
+    if after is None and skip:
+        stmt = stmt.offset(skip)
+    return db.execute(stmt).all()
+
+
+def _attach_related(db: Session, rows, expand) -> list:
+    """selectinload for merged column rows: one IN query per expanded relation."""
+    related = {}
+    for name in expand:
+        model = TASK_EXPANSIONS[name]
+        ids = {getattr(row, f"{name}_id") for row in rows} - {None}
+        related[name] = {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids))} if ids else {}
+    return [
+        SimpleNamespace(**row._asdict(), **{name: related[name].get(getattr(row, f"{name}_id")) for name in expand})
+        for row in rows
+    ]
+
+
+EXPORT_COLUMNS = (
+    Task.id,
+    Task.texto,
+    Task.fecha_creacion,
+    Task.fecha_tentiva_finalizacion,
+    Task.estado,
+    Task.user_id,
+    Task.category_id,
+)
+
+
+def export_tasks_query(db: Session, user_id: int, filters: Optional[TaskFilters] = None):
+    # Plain columns, not ORM entities: exported rows are never tracked by a session.
+    query = select(*EXPORT_COLUMNS).where(Task.user_id == user_id)
+    return apply_task_filters(db, query, filters).order_by(Task.id)
 
 
     
 
 def update_task(db: Session, task_id: int, task: TaskUpdate):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if not db_task:
-        return None  
+    values = _update_values(task)
+    if not values:
+        return get_task(db, task_id)
 
-    if task.texto is not None:
-        db_task.texto = task.texto
-    if task.fecha_tentiva_finalizacion is not None:
-        db_task.fecha_tentiva_finalizacion = task.fecha_tentiva_finalizacion
-    if task.estado is not None:
-        db_task.estado = task.estado
-    if task.category_id is not None:
-        db_task.category_id = task.category_id
+    previous = _counted_columns(db, [task_id]) if _changes_counters(values) else []
+    db_task = db.scalar(update(Task).where(Task.id == task_id).values(**values).returning(Task))
+    if not db_task:
+        return None
 
+    if previous:
+        apply_task_deltas(db, task_deltas([db_task], deltas=task_deltas(previous, -1)))
+    else:
+        apply_task_deltas(db, version_deltas([db_task.user_id]))
+    task_changed(db, "updated", [db_task])
     db.commit()
-    db.refresh(db_task)
     return db_task
 
 def delete_task(db: Session, task_id: int):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+    db_task = db.scalar(delete(Task).where(Task.id == task_id).returning(Task))
     if not db_task:
-        return None  
+        return None
 
-    db.delete(db_task)
+    apply_task_deltas(db, task_deltas([db_task], -1))
+    task_changed(db, "deleted", [db_task])
     db.commit()
     return db_task
+
+
+def _changes_counters(values: dict) -> bool:
+    return "estado" in values or "category_id" in values
+
+
+def _counted_columns(db: Session, task_ids):
+    # Counters only care about estado and category_id; RETURNING gives the new
+    # values, so the old ones are read (and locked) only when those change.
+    if not task_ids:
+        return []
+    return db.execute(
+        select(Task.id, Task.user_id, Task.estado, Task.category_id)
+        .where(Task.id.in_(task_ids))
+        .with_for_update()
+    ).all()
+
+
+def _row_response(row) -> TaskResponse:
+    return TaskResponse.model_validate(dict(row._mapping))
+
+
+def _update_values(task: TaskUpdate) -> dict:
+    values = {}
+    if task.texto is not None:
+        values["texto"] = task.texto
+    if task.fecha_tentiva_finalizacion is not None:
+        values["fecha_tentiva_finalizacion"] = task.fecha_tentiva_finalizacion
+    if task.estado is not None:
+        values["estado"] = task.estado
+    if task.category_id is not None:
+        values["category_id"] = task.category_id
+    return values
+
+
+def _bulk_update_values(task: TaskBulkUpdate) -> dict:
+    # Fields left out of the item stay as they are; an explicit null only
+    # clears the due date, every other column is required on a task.
+    values = task.model_dump(exclude_unset=True, exclude={"id"})
+    return {name: value for name, value in values.items() if value is not None or name == "fecha_tentiva_finalizacion"}
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    )
+
+
+def _validate_items(schema, items: list, results: list) -> list:
+    # One bad item must not reject the batch: it gets its own error result.
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as error:
+            item_id = item.get("id") if isinstance(item.get("id"), int) else None
+            results[index] = TaskBulkResult(index=index, id=item_id, ok=False, error=validation_message(error))
+    return valid
+
+
+def create_tasks_bulk(db: Session, items: list[dict], user_id: int):
+    results = [None] * len(items)
+    tasks = _validate_items(TaskCreate, items, results)
+    valid_categories = existing_category_ids(db, {task.category_id for _, task in tasks})
+
+    rows, positions = [], []
+    now = datetime.now()
+    for index, task in tasks:
+        if task.category_id not in valid_categories:
+            results[index] = TaskBulkResult(index=index, ok=False, error="Categoria no encontrada")
+            continue
+        rows.append({
+            "texto": task.texto,
+            "fecha_creacion": now,
+            "fecha_tentiva_finalizacion": task.fecha_tentiva_finalizacion,
+            "estado": task.estado,
+            "user_id": user_id,
+            "category_id": task.category_id,
+        })
+        positions.append(index)
+
+    if rows:
+        table = Task.__table__
+        stmt = insert(table).returning(*table.c, sort_by_parameter_order=True)
+        created = db.execute(stmt, rows).all()
+        for index, row in zip(positions, created):
+            results[index] = TaskBulkResult(index=index, id=row.id, ok=True, task=_row_response(row))
+        apply_task_deltas(db, task_deltas(created))
+        task_changed(db, "created", created)
+        db.commit()
+    return results
+
+
+def _update_rounds(tasks: list) -> list:
+    # Items are applied in order. A round never holds the same id twice, so
+    # within one round the items can run in any order, and items setting the
+    # same values share one UPDATE ... WHERE id IN (...).
+    rounds, seen = [], None
+    for index, task in tasks:
+        if seen is None or task.id in seen:
+            rounds.append({})
+            seen = set()
+        seen.add(task.id)
+        values = _bulk_update_values(task)
+        rounds[-1].setdefault(tuple(values.items()), []).append((index, task.id))
+    return rounds
+
+
+def update_tasks_bulk(db: Session, items: list[dict]):
+    results = [None] * len(items)
+    tasks = _validate_items(TaskBulkUpdate, items, results)
+    valid_categories = existing_category_ids(
+        db, {task.category_id for _, task in tasks if task.category_id is not None}
+    )
+    for index, task in tasks:
+        if task.category_id is not None and task.category_id not in valid_categories:
+            results[index] = TaskBulkResult(index=index, id=task.id, ok=False, error="Categoria no encontrada")
+    tasks = [(index, task) for index, task in tasks if results[index] is None]
+
+    table = Task.__table__
+    changed = False
+    previous = {
+        row.id: row
+        for row in _counted_columns(db, {task.id for _, task in tasks if _changes_counters(_bulk_update_values(task))})
+    }
+    latest = {}
+    updated = []
+    touched_users = set()
+    for groups in _update_rounds(tasks):
+        for values, positions in groups.items():
+            ids = [task_id for _, task_id in positions]
+            if values:
+                stmt = update(table).where(table.c.id.in_(ids)).values(**dict(values)).returning(*table.c)
+                changed = True
+            else:
+                stmt = select(*table.c).where(table.c.id.in_(ids))
+            rows = {row.id: row for row in db.execute(stmt)}
+            for index, task_id in positions:
+                row = rows.get(task_id)
+                if row is None:
+                    results[index] = TaskBulkResult(index=index, id=task_id, ok=False, error="No se encontró el Task")
+                    continue
+                results[index] = TaskBulkResult(index=index, id=row.id, ok=True, task=_row_response(row))
+                if task_id in previous:
+                    latest[task_id] = row
+            if values:
+                updated.extend(rows.values())
+                touched_users.update(row.user_id for row in rows.values())
+
+    if changed:
+        deltas = version_deltas(touched_users)
+        if latest:
+            task_deltas(latest.values(), deltas=task_deltas([previous[task_id] for task_id in latest], -1, deltas))
+        apply_task_deltas(db, deltas)
+        task_changed(db, "updated", updated)
+        db.commit()
+    return results
+
+
+def delete_tasks_bulk(db: Session, task_ids: list[int]):
+    table = Task.__table__
+    deleted = {}
+    if task_ids:
+        stmt = delete(table).where(table.c.id.in_(set(task_ids))).returning(*table.c)
+        deleted = {row.id: row for row in db.execute(stmt)}
+        apply_task_deltas(db, task_deltas(deleted.values(), -1))
+        task_changed(db, "deleted", deleted.values())
+        db.commit()
+
+    results = []
+    for index, task_id in enumerate(task_ids):
+        # A repeated id was deleted too; every occurrence reports it.
+        row = deleted.get(task_id)
+        if row is None:
+            results.append(TaskBulkResult(index=index, id=task_id, ok=False, error="No se encontró el Task"))
+        else:
+            results.append(TaskBulkResult(index=index, id=task_id, ok=True, task=_row_response(row)))
+    return results
+
+
+IMPORT_COLUMNS = ("texto", "fecha_creacion", "fecha_tentiva_finalizacion", "estado", "user_id", "category_id")
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(getattr(value, "value", value))
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(db: Session, rows: list[dict]):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in IMPORT_COLUMNS) + "\n")
+    buffer.seek(0)
+    # The raw DBAPI connection is the one bound to the session's transaction.
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY tasks ({', '.join(IMPORT_COLUMNS)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def import_tasks_chunk(db: Session, rows: list[dict]) -> int:
+    """Insert already validated rows in one transaction: COPY on Postgres, executemany elsewhere."""
+    if not rows:
+        return 0
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_rows(db, rows)
+    else:
+        db.execute(insert(Task.__table__), rows)
+    apply_task_deltas(db, task_deltas(SimpleNamespace(**row) for row in rows))
+    tasks_resynced(db, {row["user_id"] for row in rows})
+    db.commit()
+    return len(rows)
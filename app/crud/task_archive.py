@@ -0,0 +1,55 @@
+from datetime import datetime
+from sqlalchemy import select, insert, delete, func, literal, text
+from sqlalchemy.orm import Session
+from app.models.task import Task
+from app.models.archived_task import ArchivedTask
+from app.crud.task_stats import version_deltas, apply_task_deltas
+from app.core.events import task_changed
+
+ARCHIVED_STATE = "Finalizada"
+ARCHIVE_COLUMNS = ("id", "texto", "fecha_creacion", "fecha_tentiva_finalizacion", "estado", "user_id", "category_id")
+
+
+def archive_finished_tasks(db: Session, cutoff: datetime, limit: int) -> int:
+    """Move up to limit finished tasks created before cutoff into tasks_archive.
+
+    One transaction per call, so the job can stop between batches. Counters
+    keep counting archived tasks; only the owners' list versions change.
+    """
+    ids = db.scalars(
+        select(Task.id)
+        .where(Task.estado == ARCHIVED_STATE, Task.fecha_creacion < cutoff)
+        .order_by(Task.fecha_creacion, Task.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+
+    columns = [getattr(Task, name) for name in ARCHIVE_COLUMNS]
+    # Re-check the state: a task reopened since the SELECT stays hot.
+    moving = select(*columns, literal(datetime.now()).label("archived_at")).where(
+        Task.id.in_(ids), Task.estado == ARCHIVED_STATE
+    )
+    db.execute(insert(ArchivedTask).from_select([*ARCHIVE_COLUMNS, "archived_at"], moving))
+    table = Task.__table__
+    moved = db.execute(
+        delete(table).where(table.c.id.in_(ids), table.c.estado == ARCHIVED_STATE).returning(*table.c)
+    ).all()
+
+    apply_task_deltas(db, version_deltas({row.user_id for row in moved}))
+    task_changed(db, "archived", moved)
+    db.commit()
+    return len(moved)
+
+
+def table_rows(db: Session, model) -> int:
+    """Row count; the planner's estimate on Postgres, where count(*) is a full scan."""
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": model.__tablename__},
+        )
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return db.scalar(select(func.count()).select_from(model)) or 0
@@ -0,0 +1,154 @@
+from collections import Counter
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from sqlalchemy import select, delete, func, cast, literal_column, String, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.task import Task
+from app.models.archived_task import ArchivedTask
+from app.models.task_counter import TaskCounter
+from app.schemas.task import TaskStats
+
+NO_KEY = "none"
+VERSION = "version"
+
+
+def _key(value) -> str:
+    if value is None:
+        return NO_KEY
+    if isinstance(value, Enum):
+        value = value.value
+    return str(value)
+
+
+def version_deltas(user_ids, deltas: Optional[Counter] = None) -> Counter:
+    """Bump each user's collection version once per applied transaction."""
+    deltas = Counter() if deltas is None else deltas
+    for user_id in user_ids:
+        deltas[(user_id, VERSION, "")] = 1
+    return deltas
+
+
+def task_deltas(rows, sign: int = 1, deltas: Optional[Counter] = None) -> Counter:
+    """Accumulate counter deltas for rows exposing user_id, estado and category_id."""
+    deltas = Counter() if deltas is None else deltas
+    for row in rows:
+        deltas[(row.user_id, "total", "")] += sign
+        deltas[(row.user_id, "estado", _key(row.estado))] += sign
+        deltas[(row.user_id, "category", _key(row.category_id))] += sign
+        deltas[(row.user_id, VERSION, "")] = 1
+    return deltas
+
+
+def _upsert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(TaskCounter)
+    if dialect == "sqlite":
+        return sqlite.insert(TaskCounter)
+    raise NotImplementedError(f"Task counters need an upsert for '{dialect}'")
+
+
+def apply_task_deltas(db: Session, deltas: Counter):
+    """Apply the deltas with one multi-row upsert in the caller's transaction."""
+    values = [
+        {"user_id": user_id, "dimension": dimension, "key": key, "count": delta}
+        for (user_id, dimension, key), delta in deltas.items()
+        if delta and user_id is not None
+    ]
+    if not values:
+        return
+    stmt = _upsert(db).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskCounter.user_id, TaskCounter.dimension, TaskCounter.key],
+        set_={"count": TaskCounter.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def get_task_version(db: Session, user_id: int) -> int:
+    return db.scalar(
+        select(TaskCounter.count).where(
+            TaskCounter.user_id == user_id,
+            TaskCounter.dimension == VERSION,
+            TaskCounter.key == "",
+        )
+    ) or 0
+
+
+def get_task_stats(db: Session, user_id: int) -> TaskStats:
+    rows = db.execute(
+        select(TaskCounter.dimension, TaskCounter.key, TaskCounter.count)
+        .where(TaskCounter.user_id == user_id)
+    ).all()
+    # Overdue depends on the clock, so it cannot be kept as a counter; this
+    # count is a range scan on (user_id, fecha_tentiva_finalizacion).
+    overdue = db.scalar(
+        select(func.count()).select_from(Task).where(
+            Task.user_id == user_id,
+            Task.fecha_tentiva_finalizacion < datetime.now(),
+            Task.estado != "Finalizada",
+        )
+    )
+    stats = TaskStats(total=0, por_estado={}, por_categoria={}, vencidas=overdue or 0)
+    for dimension, key, count in rows:
+        if count <= 0:
+            continue
+        if dimension == "total":
+            stats.total = count
+        elif dimension == "estado":
+            stats.por_estado[key] = count
+        elif dimension == "category":
+            stats.por_categoria[key] = count
+    return stats
+
+
+def _counted_tasks(user_id: Optional[int]):
+    # Archived tasks still count: archival moves rows, it does not delete them.
+    def rows(model):
+        stmt = select(model.user_id, model.estado, model.category_id).where(model.user_id.is_not(None))
+        if user_id is not None:
+            stmt = stmt.where(model.user_id == user_id)
+        return stmt
+
+    return union_all(rows(Task), rows(ArchivedTask)).subquery("counted")
+
+
+def _grouped_counts(user_id: Optional[int]):
+    tasks = _counted_tasks(user_id)
+
+    def grouped(dimension: str, column):
+        # Constants are inlined so every branch of the UNION has plain text columns.
+        if column is None:
+            key = literal_column("''")
+            group_by = (tasks.c.user_id,)
+        else:
+            key = func.coalesce(cast(column, String), literal_column(f"'{NO_KEY}'"))
+            group_by = (tasks.c.user_id, key)
+        stmt = select(tasks.c.user_id, literal_column(f"'{dimension}'"), key, func.count())
+        return stmt.group_by(*group_by)
+
+    return union_all(
+        grouped("total", None),
+        grouped("estado", tasks.c.estado),
+        grouped("category", tasks.c.category_id),
+    )
+
+
+def rebuild_statements(user_id: Optional[int] = None) -> tuple:
+    # Versions are not derived from tasks; resetting them could replay old ETags.
+    clear = delete(TaskCounter).where(TaskCounter.dimension != VERSION)
+    if user_id is not None:
+        clear = clear.where(TaskCounter.user_id == user_id)
+    fill = TaskCounter.__table__.insert().from_select(
+        ["user_id", "dimension", "key", "count"], _grouped_counts(user_id)
+    )
+    return clear, fill
+
+
+def rebuild_task_counters(db: Session, user_id: Optional[int] = None):
+    """Recompute counters from tasks and tasks_archive (all users, or just one)."""
+    for statement in rebuild_statements(user_id):
+        db.execute(statement)
+    db.commit()
@@ -1,51 +1,90 @@
 # app/crud/user.py
+from typing import Optional
+from sqlalchemy import insert, update, delete
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
-
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.contrasenia)
-    db_user = User(
-        nombre_usuario=user.nombre_usuario,
-        contrasenia=hashed_password,  # Changed from hashed_contrasenia to contrasenia
-        imagen_perfil=user.imagen_perfil
+from app.schemas.user import UserCreate, UserUpdate, UserResponse
+from app.core.security import get_password_hash, invalidate_principal
+from app.core.serialization import schema_columns
+from app.core.events import tasks_resynced
+from app.crud.task_stats import VERSION, version_deltas, apply_task_deltas
+from app.models.archived_task import ArchivedTask
+from app.models.task import Task
+from app.models.task_counter import TaskCounter
+
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.contrasenia)
+    db_user = db.scalar(
+        insert(User).values(
+            nombre_usuario=user.nombre_usuario,
+            contrasenia=hashed_password,  # Changed from hashed_contrasenia to contrasenia
+            imagen_perfil=user.imagen_perfil
+        ).returning(User)
     )
-    db.add(db_user)
     db.commit()
-    db.refresh(db_user)
     return db_user
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+def get_user(db: Session, user_id: int, columns=None):
+    query = db.query(*columns) if columns else db.query(User)
+    return query.filter(User.id == user_id).first()
 
 def get_user_by_username(db: Session, nombre_usuario: str):
     return db.query(User).filter(User.nombre_usuario == nombre_usuario).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+RESPONSE_COLUMNS = schema_columns(UserResponse, User)
 
-def update_user(db: Session, user_id: int, user: UserUpdate):
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        return None  
+def response_columns(fields=None) -> tuple:
+    return schema_columns(UserResponse, User, fields) if fields else RESPONSE_COLUMNS
 
+def get_users(db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None, columns=None):
+    query = db.query(*columns) if columns else db.query(User)
+    if after is not None:
+        query = query.filter(User.id > after)
+    elif skip:
+        query = query.offset(skip)
+    return query.order_by(User.id).limit(limit).all()
+
+def update_user(db: Session, user_id: int, user: UserUpdate, hashed_password: Optional[str] = None):
+    values = {}
     if user.nombre_usuario is not None:
-        db_user.nombre_usuario = user.nombre_usuario
-    if user.contrasenia is not None:
-        db_user.contrasenia = get_password_hash(user.contrasenia)  # Changed from hashed_contrasenia to contrasenia
+        values["nombre_usuario"] = user.nombre_usuario
+    if hashed_password is not None:
+        values["contrasenia"] = hashed_password
+    elif user.contrasenia is not None:
+        values["contrasenia"] = get_password_hash(user.contrasenia)  # Changed from hashed_contrasenia to contrasenia
     if user.imagen_perfil is not None:
-        db_user.imagen_perfil = user.imagen_perfil
+        values["imagen_perfil"] = user.imagen_perfil
+    if not values:
+        return get_user(db, user_id)
+
+    db_user = db.scalar(update(User).where(User.id == user_id).values(**values).returning(User))
+    if not db_user:
+        return None
 
     db.commit()
-    db.refresh(db_user)
+    invalidate_principal(user_id)
     return db_user
 
+def update_password_hash(db: Session, user_id: int, hashed_password: str):
+    db.execute(update(User).where(User.id == user_id).values(contrasenia=hashed_password))
+    db.commit()
+
 def delete_user(db: Session, user_id: int):
-    db_user = db.query(User).filter(User.id == user_id).first()
+    # Like the ORM delete this replaced, tasks outlive their owner with
+    # user_id NULL; the foreign key would reject the DELETE otherwise.
+    db.execute(update(Task.__table__).where(Task.user_id == user_id).values(user_id=None))
+    db.execute(update(ArchivedTask).where(ArchivedTask.user_id == user_id).values(user_id=None))
+    db_user = db.scalar(delete(User).where(User.id == user_id).returning(User))
     if not db_user:
-        return None  
+        db.rollback()
+        return None
+
+    # Unowned tasks are not counted; the version row stays so old ETags cannot match again.
+    db.execute(delete(TaskCounter).where(TaskCounter.user_id == user_id, TaskCounter.dimension != VERSION))
+    apply_task_deltas(db, version_deltas([user_id]))
+    tasks_resynced(db, [user_id])
 
-    db.delete(db_user)
     db.commit()
+    invalidate_principal(user_id)
     return db_user
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""Versioned schema management.
+
+The schema_version table holds the version this database was last migrated
+to. When it matches SCHEMA_VERSION, startup does no DDL at all: one SELECT
+replaces create_all's per-table reflection. Otherwise create_all adds any
+missing tables, and then the migrations newer than the stored version run
+in order. A database that predates versioning has no stored version, so it
+runs every migration. Each migration is idempotent.
+
+    python -m app.db.migrations          # migrate
+    python -m app.db.migrations --check  # print stored vs. expected version
+"""
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, Table, exc, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from app.db.database import Base
+
+logger = logging.getLogger(__name__)
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime),
+)
+
+# Arbitrary constant shared by every worker racing to migrate the same database.
+MIGRATION_LOCK_ID = 727_001
+
+
+def _create_indexes(connection: Connection, table, names):
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+
+def _task_indexes(connection: Connection):
+    from app.models.task import Task
+
+    _create_indexes(connection, Task.__table__, {
+        "ix_tasks_user_id_id",
+        "ix_tasks_user_id_estado_id",
+        "ix_tasks_user_id_category_id_id",
+        "ix_tasks_user_id_fecha_tentiva",
+    })
+
+
+def _task_search(connection: Connection):
+    from app.models.task import Task, SQLITE_FTS_DDL
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        _create_indexes(connection, Task.__table__, {"ix_tasks_texto_fts"})
+    elif dialect == "sqlite":
+        existed = inspect(connection).has_table("tasks_fts")
+        for statement in SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            # Index the rows written before the triggers existed.
+            connection.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+
+
+def _task_counters(connection: Connection):
+    from app.crud.task_stats import rebuild_statements
+
+    for statement in rebuild_statements():
+        connection.execute(statement)
+
+
+def _task_due_date_index(connection: Connection):
+    from app.models.task import Task
+
+    _create_indexes(connection, Task.__table__, {"ix_tasks_fecha_tentiva_id"})
+
+
+def _task_archive(connection: Connection):
+    from app.models.task import Task
+
+    # tasks_archive itself comes from create_all.
+    _create_indexes(connection, Task.__table__, {"ix_tasks_finalizada_fecha_creacion"})
+
+
+def _task_autoincrement(connection: Connection):
+    from app.models.task import Task, SQLITE_FTS_DDL
+
+    if connection.dialect.name != "sqlite":
+        # Sequences never hand out an id twice.
+        return
+    table = Task.__table__
+    ddl = connection.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'"))
+    if "AUTOINCREMENT" not in ddl.upper():
+        # SQLite cannot alter a primary key: copy into a rebuilt table. Dropping
+        # the old one drops its indexes and FTS triggers, so both are recreated;
+        # rowids are kept, so tasks_fts stays valid.
+        columns = ", ".join(column.name for column in table.columns)
+        create = str(CreateTable(table).compile(dialect=connection.dialect)).strip()
+        connection.execute(text(create.replace("CREATE TABLE tasks ", "CREATE TABLE tasks_rebuild ", 1)))
+        connection.execute(text(f"INSERT INTO tasks_rebuild ({columns}) SELECT {columns} FROM tasks"))
+        connection.execute(text("DROP TABLE tasks"))
+        connection.execute(text("ALTER TABLE tasks_rebuild RENAME TO tasks"))
+        _create_indexes(connection, table, {index.name for index in table.indexes} - {"ix_tasks_texto_fts"})
+        for statement in SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+    # Ids already moved to the archive must never be handed out again either.
+    connection.execute(text("DELETE FROM sqlite_sequence WHERE name = 'tasks'"))
+    connection.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', max("
+        "coalesce((SELECT max(id) FROM tasks), 0), coalesce((SELECT max(id) FROM tasks_archive), 0))"
+    ))
+
+
+# (version, description, upgrade). Append only; never renumber.
+MIGRATIONS = (
+    (1, "base tables", lambda connection: None),
+    (2, "task keyset and filter indexes", _task_indexes),
+    (3, "task full-text search", _task_search),
+    (4, "task counters backfill", _task_counters),
+    (5, "task due-date index", _task_due_date_index),
+    (6, "idempotency keys table", lambda connection: None),
+    (7, "task archive table and candidates index", _task_archive),
+    (8, "never reuse task ids on sqlite", _task_autoincrement),
+    (9, "task import jobs table", lambda connection: None),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _import_models():
+    from app.models import User, Task, Category, TaskCounter, IdempotencyKey, ArchivedTask, TaskImportJob  # noqa: F401 - registers the tables
+
+
+def stored_version(connection: Connection):
+    if not inspect(connection).has_table(schema_version.name):
+        return None
+    return connection.scalar(select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1))
+
+
+def check_schema(engine: Engine):
+    """Stored version, or None for an unversioned database; never writes."""
+    with engine.connect() as connection:
+        try:
+            return connection.scalar(select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1))
+        except exc.DBAPIError:
+            # No schema_version table yet; this is the slow path, so reflect to be sure.
+            connection.rollback()
+            return stored_version(connection)
+
+
+def migrate(engine: Engine) -> int:
+    """Bring the database up to SCHEMA_VERSION; returns the number of migrations run."""
+    _import_models()
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Serialize workers; whoever waits re-reads the version afterwards.
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        current = stored_version(connection)
+        if current is not None and current >= SCHEMA_VERSION:
+            return 0
+        Base.metadata.create_all(connection)
+        applied = 0
+        for version, description, upgrade in MIGRATIONS:
+            if current is not None and version <= current:
+                continue
+            started = time.perf_counter()
+            upgrade(connection)
+            connection.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.now()
+            ))
+            applied += 1
+            logger.info("Applied migration %d (%s) in %.1fms", version, description, (time.perf_counter() - started) * 1000)
+        return applied
+
+
+def ensure_schema(engine: Engine, auto_migrate: bool = True):
+    current = check_schema(engine)
+    if current == SCHEMA_VERSION:
+        logger.info("Database schema is at version %d", current)
+        return
+    if current is not None and current > SCHEMA_VERSION:
+        logger.warning("Database schema version %d is newer than this code (%d)", current, SCHEMA_VERSION)
+        return
+    if not auto_migrate:
+        logger.warning("Database schema is at version %s, expected %d; run python -m app.db.migrations", current, SCHEMA_VERSION)
+        return
+    applied = migrate(engine)
+    logger.info("Database schema migrated to version %d (%d migrations)", SCHEMA_VERSION, applied)
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.db.database import engine
+
+    parser = argparse.ArgumentParser(description="Apply or check database schema migrations.")
+    parser.add_argument("--check", action="store_true", help="only print the stored and expected versions")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.check:
+        print(f"stored={check_schema(engine)} expected={SCHEMA_VERSION}")
+    else:
+        ensure_schema(engine)
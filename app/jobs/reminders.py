@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, tuple_
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.events import broadcaster, publish_events
+from app.core.metrics import Counter, Gauge
+from app.db.database import SessionLocal
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+UPCOMING = "upcoming"
+OVERDUE = "overdue"
+DONE = "Finalizada"
+
+REMINDERS_FIRED = Counter("task_reminders_fired_total", "Due-date reminders fired.", ("kind",))
+REMINDERS_PENDING = Gauge("task_reminders_pending", "Deadlines held in the reminder heap.")
+
+
+def load_due_window(after: tuple, until: datetime, limit: int) -> list:
+    """Next open tasks by (fecha_tentiva_finalizacion, id) after the keyset, up to until."""
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(Task.fecha_tentiva_finalizacion, Task.id, Task.user_id)
+            .where(
+                tuple_(Task.fecha_tentiva_finalizacion, Task.id) > tuple_(*after),
+                Task.fecha_tentiva_finalizacion <= until,
+                Task.estado != DONE,
+            )
+            .order_by(Task.fecha_tentiva_finalizacion, Task.id)
+            .limit(limit)
+        ).all()
+    finally:
+        db.close()
+
+
+def load_open_deadlines(task_ids: list) -> dict:
+    """Current deadline and owner of each task id that is still open."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Task.id, Task.fecha_tentiva_finalizacion, Task.user_id)
+            .where(Task.id.in_(task_ids), Task.estado != DONE)
+        ).all()
+        return {task_id: (due, user_id) for task_id, due, user_id in rows}
+    finally:
+        db.close()
+
+
+class ReminderScheduler:
+    """Min-heap of upcoming deadlines, filled a time window at a time.
+
+    Only deadlines up to REMINDER_HORIZON_SECONDS ahead are held in memory.
+    They are read through the (fecha_tentiva_finalizacion, id) index, and
+    task events keep that window current. Events only cover this process's
+    writes unless EVENTS_PG_NOTIFY is on, so the window is also re-read every
+    REMINDER_RESCAN_SECONDS and each reminder is checked against its row
+    before it fires. Heap entries are never removed in place: _due holds each
+    task's current deadline, and popped entries that no longer match it are
+    skipped.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self._loaded_until = None
+        self._touched = None
+        self._scanned_at = 0.0
+        self._generation = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if not settings.EVENTS_PG_NOTIFY:
+            logger.warning(
+                "Reminders without EVENTS_PG_NOTIFY only see other workers' task changes "
+                "on the rescan every %ss; enable it when running more than one worker",
+                settings.REMINDER_RESCAN_SECONDS,
+            )
+        broadcaster.add_listener(self.on_event)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        broadcaster.remove_listener(self.on_event)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _track(self, task_id: int, due: Optional[datetime], user_id: int):
+        if due is None:
+            self._due.pop(task_id, None)
+            return
+        if self._due.get(task_id, (None,))[0] == due:
+            return
+        self._due[task_id] = (due, user_id)
+        lead = due - timedelta(seconds=settings.REMINDER_LEAD_SECONDS)
+        heapq.heappush(self._heap, (lead, task_id, UPCOMING, due))
+        heapq.heappush(self._heap, (due, task_id, OVERDUE, due))
+
+    def on_event(self, message: dict):
+        if self._loaded_until is None:
+            return
+        if message["type"] == "resync":
+            # Bulk change we cannot see row by row: reload the window.
+            self._reset()
+            return
+        task = message.get("task")
+        if not task or message["type"] not in ("created", "updated", "deleted"):
+            return
+        if self._touched is not None:
+            self._touched.add(task["id"])
+        due = task["fecha_tentiva_finalizacion"]
+        if isinstance(due, str):
+            due = datetime.fromisoformat(due)
+        if message["type"] == "deleted" or task["estado"] == DONE or due is None or due > self._loaded_until:
+            # Beyond the window the loader will pick it up when it gets there.
+            self._due.pop(task["id"], None)
+        elif due > datetime.now() or task["id"] in self._due:
+            # A deadline already past and fired is not re-armed by editing the task.
+            self._track(task["id"], due, task["user_id"])
+        REMINDERS_PENDING.set(value=len(self._due))
+        self._wakeup.set()
+
+    def _reset(self):
+        self._generation += 1
+        self._heap = []
+        self._due = {}
+        self._loaded_until = None
+        self._wakeup.set()
+
+    async def _read(self, after: tuple, until: datetime) -> bool:
+        generation = self._generation
+        self._touched = set()
+        try:
+            while True:
+                rows = await run_in_threadpool(load_due_window, after, until, settings.REMINDER_BATCH_SIZE)
+                if generation != self._generation:
+                    # Reset while reading; the next iteration reloads from scratch.
+                    return False
+                for due, task_id, user_id in rows:
+                    # Changed while we were reading; the event already has the newer value.
+                    if task_id not in self._touched:
+                        self._track(task_id, due, user_id)
+                if len(rows) < settings.REMINDER_BATCH_SIZE:
+                    return True
+                after = (rows[-1][0], rows[-1][1])
+        finally:
+            self._touched = None
+
+    async def _load(self, now: datetime):
+        if self._loaded_until is None:
+            start = now - timedelta(seconds=settings.REMINDER_GRACE_SECONDS)
+            self._loaded_until = start
+            self._scanned_at = time.monotonic()
+        until = now + timedelta(seconds=settings.REMINDER_HORIZON_SECONDS + settings.REMINDER_LEAD_SECONDS)
+        if await self._read((self._loaded_until, 2 ** 31 - 1), until):
+            self._loaded_until = until
+        REMINDERS_PENDING.set(value=len(self._due))
+
+    async def _rescan(self, now: datetime):
+        # Picks up deadlines set by other workers. Only future ones: a deadline
+        # already past has fired, or was set too late to be worth firing.
+        self._scanned_at = time.monotonic()
+        await self._read((now, 2 ** 31 - 1), self._loaded_until)
+        REMINDERS_PENDING.set(value=len(self._due))
+
+    def _pop_due(self, now: datetime) -> list:
+        messages = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, task_id, kind, due = heapq.heappop(self._heap)
+            current = self._due.get(task_id)
+            if current is None or current[0] != due:
+                continue
+            if kind == UPCOMING and due <= now:
+                # Loaded or changed too late for a heads-up; overdue follows right away.
+                continue
+            if kind == OVERDUE:
+                del self._due[task_id]
+            messages.append({
+                "type": "reminder",
+                "kind": kind,
+                "user_id": current[1],
+                "task_id": task_id,
+                "fecha_tentiva_finalizacion": due,
+            })
+        return messages
+
+    def _still_due(self, message: dict, current: Optional[tuple]) -> bool:
+        task_id, due = message["task_id"], message["fecha_tentiva_finalizacion"]
+        if current is not None and current[0] == due:
+            return True
+        # Finished, deleted or moved by a write this process never heard of.
+        if self._due.get(task_id, (None,))[0] == due:
+            del self._due[task_id]
+        if current is not None and current[0] is not None and datetime.now() < current[0] <= self._loaded_until:
+            self._track(task_id, current[0], current[1])
+        return False
+
+    async def _fire(self, messages: list):
+        for start in range(0, len(messages), settings.REMINDER_BATCH_SIZE):
+            batch = messages[start:start + settings.REMINDER_BATCH_SIZE]
+            current = await run_in_threadpool(load_open_deadlines, [message["task_id"] for message in batch])
+            batch = [message for message in batch if self._still_due(message, current.get(message["task_id"]))]
+            if not batch:
+                continue
+            await run_in_threadpool(publish_events, batch)
+            for message in batch:
+                REMINDERS_FIRED.inc(message["kind"])
+        REMINDERS_PENDING.set(value=len(self._due))
+
+    async def _run(self):
+        refill_every = max(settings.REMINDER_HORIZON_SECONDS // 2, 1)
+        rescan_every = settings.REMINDER_RESCAN_SECONDS
+        while True:
+            try:
+                now = datetime.now()
+                if self._loaded_until is None or (self._loaded_until - now).total_seconds() < refill_every:
+                    await self._load(now)
+                elif rescan_every and time.monotonic() - self._scanned_at >= rescan_every:
+                    await self._rescan(now)
+                messages = self._pop_due(datetime.now())
+                if messages:
+                    await self._fire(messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reminder scheduler iteration failed")
+            timeout = min(refill_every, rescan_every) if rescan_every else refill_every
+            if self._heap:
+                timeout = min(timeout, max((self._heap[0][0] - datetime.now()).total_seconds(), 0))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+_scheduler = None
+
+
+def start_reminders():
+    global _scheduler
+    if settings.REMINDERS_ENABLED and _scheduler is None:
+        _scheduler = ReminderScheduler()
+        _scheduler.start()
+
+
+async def stop_reminders():
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.crud.task_archive import archive_finished_tasks, table_rows
+from app.db.database import SessionLocal
+from app.models.task import Task
+from app.models.archived_task import ArchivedTask
+
+logger = logging.getLogger(__name__)
+
+TASKS_ARCHIVED = Counter("tasks_archived_total", "Finished tasks moved from tasks to tasks_archive.")
+TABLE_ROWS = Gauge("task_table_rows", "Rows in the hot and archive task tables (estimated on Postgres).", ("table",))
+
+_archive_task = None
+
+
+def archive_batch(cutoff: datetime) -> int:
+    db = SessionLocal()
+    try:
+        return archive_finished_tasks(db, cutoff, settings.TASK_ARCHIVE_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def record_table_rows():
+    db = SessionLocal()
+    try:
+        for model in (Task, ArchivedTask):
+            TABLE_ROWS.set(model.__tablename__, value=table_rows(db, model))
+    finally:
+        db.close()
+
+
+async def archive_finished(cutoff: datetime) -> int:
+    """Move every eligible task, one short transaction per batch."""
+    moved = 0
+    while True:
+        batch = await run_in_threadpool(archive_batch, cutoff)
+        moved += batch
+        TASKS_ARCHIVED.inc(amount=batch)
+        if batch < settings.TASK_ARCHIVE_BATCH_SIZE:
+            break
+        # Let request traffic in between batches.
+        await asyncio.sleep(settings.TASK_ARCHIVE_PAUSE_MS / 1000)
+    await run_in_threadpool(record_table_rows)
+    return moved
+
+
+def archive_cutoff() -> datetime:
+    return datetime.now() - timedelta(days=settings.TASK_ARCHIVE_AFTER_DAYS)
+
+
+async def _archive_loop(interval: int):
+    while True:
+        try:
+            moved = await archive_finished(archive_cutoff())
+            logger.info("Archived %d finished tasks", moved)
+        except Exception:
+            logger.exception("Task archival failed")
+        await asyncio.sleep(interval)
+
+
+def start_archival():
+    global _archive_task
+    if settings.TASK_ARCHIVE_INTERVAL_SECONDS > 0 and _archive_task is None:
+        _archive_task = asyncio.create_task(_archive_loop(settings.TASK_ARCHIVE_INTERVAL_SECONDS))
+
+
+async def stop_archival():
+    global _archive_task
+    if _archive_task is not None:
+        _archive_task.cancel()
+        await asyncio.gather(_archive_task, return_exceptions=True)
+        _archive_task = None
+
+
+if __name__ == "__main__":
+    moved = asyncio.run(archive_finished(archive_cutoff()))
+    print(f"Archived {moved} finished tasks")
@@ -0,0 +1,174 @@
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.category import existing_category_ids
+from app.crud.task import import_tasks_chunk, validation_message
+from app.db.database import SessionLocal
+from app.models.task_import_job import TaskImportJob
+from app.schemas.task import TaskCreate, TaskImportError, TaskImportStatus
+
+logger = logging.getLogger(__name__)
+
+# Job state lives in task_import_jobs so any worker can answer the status
+# poll; finished jobs stay queryable for a day.
+JOB_TTL = timedelta(days=1)
+
+
+def _status(job_id: str, format: str, status: str, imported: int, failed: int, errors: list, detail, started_at, finished_at) -> TaskImportStatus:
+    elapsed = ((finished_at or datetime.now()) - started_at).total_seconds() if started_at else 0.0
+    return TaskImportStatus(
+        id=job_id,
+        status=status,
+        format=format,
+        processed=imported + failed,
+        imported=imported,
+        failed=failed,
+        rows_per_second=round(imported / elapsed, 1) if elapsed > 0 else 0.0,
+        started_at=started_at,
+        finished_at=finished_at,
+        detail=detail,
+        errors=errors,
+    )
+
+
+class ImportJob:
+    def __init__(self, path: str, format: str, user_id: int):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.format = format
+        self.user_id = user_id
+        self.status = "pending"
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.detail = None
+        self.started_at = None
+        self.finished_at = None
+
+    def snapshot(self) -> TaskImportStatus:
+        return _status(
+            self.id, self.format, self.status, self.imported, self.failed,
+            list(self.errors), self.detail, self.started_at, self.finished_at,
+        )
+
+    def _save(self, db):
+        # Progress is written after every chunk; the poll may hit another worker.
+        db.execute(update(TaskImportJob).where(TaskImportJob.id == self.id).values(
+            status=self.status,
+            imported=self.imported,
+            failed=self.failed,
+            errors=json.dumps([error.model_dump() for error in self.errors], ensure_ascii=False),
+            detail=self.detail,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        ))
+        db.commit()
+
+    def _reject(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append(TaskImportError(row=row, error=error))
+
+    def _records(self, stream):
+        if self.format == "csv":
+            for row, record in enumerate(csv.DictReader(stream), start=1):
+                # Empty CSV cells mean "not given", like a missing JSON key.
+                yield row, {key: value for key, value in record.items() if value not in ("", None)}
+        else:
+            for row, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield row, json.loads(line)
+                except json.JSONDecodeError as error:
+                    yield row, error
+
+    def _flush(self, db, chunk: list):
+        valid_categories = existing_category_ids(db, {task.category_id for _, task in chunk})
+        rows = []
+        now = datetime.now()
+        for row, task in chunk:
+            if task.category_id not in valid_categories:
+                self._reject(row, "Categoria no encontrada")
+                continue
+            rows.append({
+                "texto": task.texto,
+                "fecha_creacion": now,
+                "fecha_tentiva_finalizacion": task.fecha_tentiva_finalizacion,
+                "estado": task.estado,
+                "user_id": self.user_id,
+                "category_id": task.category_id,
+            })
+        self.imported += import_tasks_chunk(db, rows)
+        self._save(db)
+
+    def run(self):
+        db = SessionLocal()
+        try:
+            self.status = "running"
+            self.started_at = datetime.now()
+            self._save(db)
+            with open(self.path, encoding="utf-8-sig", newline="") as stream:
+                chunk = []
+                for row, record in self._records(stream):
+                    if isinstance(record, json.JSONDecodeError):
+                        self._reject(row, "JSON inválido")
+                        continue
+                    try:
+                        chunk.append((row, TaskCreate.model_validate(record)))
+                    except ValidationError as error:
+                        self._reject(row, validation_message(error))
+                        continue
+                    if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                        self._flush(db, chunk)
+                        chunk = []
+                self._flush(db, chunk)
+            self.status = "completed"
+        except Exception as error:
+            # Chunks already committed stay imported; the status says where it stopped.
+            db.rollback()
+            logger.exception("Task import %s failed", self.id)
+            self.status = "failed"
+            self.detail = str(error)
+        finally:
+            os.unlink(self.path)
+        try:
+            self.finished_at = datetime.now()
+            self._save(db)
+        finally:
+            db.close()
+
+
+def create_import_job(upload: UploadFile, format: str, user_id: int) -> ImportJob:
+    # Starlette closes the upload once the response is sent, so the job reads
+    # its own copy; the copy is streamed, never held in memory.
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{format}") as spool:
+        shutil.copyfileobj(upload.file, spool, length=1024 * 1024)
+    job = ImportJob(spool.name, format, user_id)
+    now = datetime.now()
+    with SessionLocal() as db:
+        db.execute(delete(TaskImportJob).where(TaskImportJob.created_at < now - JOB_TTL))
+        db.add(TaskImportJob(id=job.id, user_id=user_id, format=format, status=job.status, imported=0, failed=0, errors="[]", created_at=now))
+        db.commit()
+    return job
+
+
+def get_import_status(db: Session, job_id: str) -> Optional[TaskImportStatus]:
+    job = db.get(TaskImportJob, job_id)
+    if job is None or job.created_at < datetime.now() - JOB_TTL:
+        return None
+    return _status(
+        job.id, job.format, job.status, job.imported, job.failed,
+        json.loads(job.errors or "[]"), job.detail, job.started_at, job.finished_at,
+    )
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.crud.task_stats import rebuild_task_counters
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_reconcile_task = None
+
+
+def reconcile_task_counters():
+    db = SessionLocal()
+    try:
+        rebuild_task_counters(db)
+    finally:
+        db.close()
+
+
+async def _reconcile_loop(interval: int):
+    while True:
+        try:
+            await run_in_threadpool(reconcile_task_counters)
+            logger.info("Task counters reconciled")
+        except Exception:
+            logger.exception("Task counter reconciliation failed")
+        await asyncio.sleep(interval)
+
+
+def start_reconciliation():
+    global _reconcile_task
+    if settings.TASK_STATS_RECONCILE_SECONDS > 0 and _reconcile_task is None:
+        _reconcile_task = asyncio.create_task(_reconcile_loop(settings.TASK_STATS_RECONCILE_SECONDS))
+
+
+async def stop_reconciliation():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        await asyncio.gather(_reconcile_task, return_exceptions=True)
+        _reconcile_task = None
+
+
+if __name__ == "__main__":
+    reconcile_task_counters()
+    print("Task counters rebuilt successfully!")
@@ -1,8 +1,18 @@
 # main.py
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from app.db.database import init_db
+from app.db.database import init_db, PrimaryPinMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import Gauge, MetricsMiddleware, render_metrics
+from app.core.config import settings
+from app.core.security import shutdown_hash_executor
+from app.core.events import start_events, stop_events
 
 
 logging.basicConfig(level=logging.INFO)
@@ -18,30 +28,75 @@ origins = [
     "http://127.0.0.1:3000",
 ]
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(PrimaryPinMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Added last so it wraps everything: responses short-circuited by the
+# middlewares above (idempotency 4xx, replays) still get this caller's CORS headers.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-SQL-Count", "Idempotent-Replayed"],
 )
 
+STARTUP_SECONDS = Gauge("app_startup_seconds", "Worker cold start time by phase.", ("phase",))
+
 @app.on_event("startup")
 async def startup_event():
+    started = time.perf_counter()
+    STARTUP_SECONDS.set("import", value=started - _import_started)
     init_db()
+    STARTUP_SECONDS.set("schema", value=time.perf_counter() - started)
+    start_events()
+    # Background jobs are imported only where they are switched on.
+    if settings.TASK_STATS_RECONCILE_SECONDS > 0:
+        from app.jobs.task_stats import start_reconciliation
+        start_reconciliation()
+    if settings.REMINDERS_ENABLED:
+        from app.jobs.reminders import start_reminders
+        start_reminders()
+    if settings.TASK_ARCHIVE_INTERVAL_SECONDS > 0:
+        from app.jobs.task_archive import start_archival
+        start_archival()
+    total = time.perf_counter() - _import_started
+    STARTUP_SECONDS.set("total", value=total)
+    logger.info("Startup completed in %.1fms", total * 1000)
 
-from app.api import auth, tasks, categories, user
+@app.on_event("shutdown")
+async def shutdown_event():
+    if settings.TASK_ARCHIVE_INTERVAL_SECONDS > 0:
+        from app.jobs.task_archive import stop_archival
+        await stop_archival()
+    if settings.REMINDERS_ENABLED:
+        from app.jobs.reminders import stop_reminders
+        await stop_reminders()
+    if settings.TASK_STATS_RECONCILE_SECONDS > 0:
+        from app.jobs.task_stats import stop_reconciliation
+        await stop_reconciliation()
+    stop_events()
+    shutdown_hash_executor()
+
+from app.api import auth, tasks, categories, user, stats, batch
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 app.include_router(categories.router, prefix="/categories", tags=["categories"])
 app.include_router(user.router, prefix="/users", tags=["users"])
+app.include_router(stats.router, prefix="/stats", tags=["stats"])
+app.include_router(batch.router, prefix="/batch", tags=["batch"])
 
 @app.get("/")
 async def root():
     logger.info("Root endpoint accessed")
     return {"message": "Welcome to TaskTracker API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 def setup_postman_generator(app: FastAPI):
     """Setup Postman collection generator routes."""
     app.include_router(router, prefix="/postman", tags=["postman"])
\ No newline at end of file
@@ -1,9 +1,17 @@
 from .user import User
 from .task import Task
 from .category import Category
+from .task_counter import TaskCounter
+from .idempotency_key import IdempotencyKey
+from .archived_task import ArchivedTask
+from .task_import_job import TaskImportJob
 
 __all__ = [
     "User",
     "Task",
-    "Category"
+    "Category",
+    "TaskCounter",
+    "IdempotencyKey",
+    "ArchivedTask",
+    "TaskImportJob"
 ]
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+from app.models.task import Task
+
+
+class ArchivedTask(Base):
+    """Finished tasks moved out of tasks by the archival job, ids preserved.
+
+    No foreign keys: archived rows never block deleting a user or category.
+    """
+    __tablename__ = "tasks_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    texto = Column(String)
+    fecha_creacion = Column(DateTime)
+    fecha_tentiva_finalizacion = Column(DateTime)
+    estado = Column(Task.__table__.c.estado.type)
+    user_id = Column(Integer)
+    user = relationship("User", primaryjoin="foreign(ArchivedTask.user_id) == User.id", viewonly=True)
+    category_id = Column(Integer)
+    category = relationship("Category", primaryjoin="foreign(ArchivedTask.category_id) == Category.id", viewonly=True)
+    archived_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_tasks_archive_user_id_id", "user_id", "id"),
+    )
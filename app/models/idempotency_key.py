@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, Text
+from app.db.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored first response for an Idempotency-Key, shared by all workers.
+
+    status is NULL while the first request is still running.
+    """
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    status = Column(Integer)
+    headers = Column(Text)
+    body = Column(LargeBinary)
+    created_at = Column(DateTime, nullable=False, index=True)
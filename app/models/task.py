@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Index, DDL, event, func, literal_column
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
+# Inline literals (not bound parameters) so queries render the exact
+# expression the GIN index was built on, even with server-side binding.
+FTS_CONFIG = literal_column("'simple'")
+
+
+def texto_tsvector(texto):
+    return func.to_tsvector(FTS_CONFIG, func.coalesce(texto, literal_column("''")))
+
+
 class Task(Base):
     __tablename__ = "tasks"
     id = Column(Integer, primary_key=True, index=True)
@@ -13,3 +22,41 @@ class Task(Base):
     user = relationship("User")
     category_id = Column(Integer, ForeignKey("categories.id"))
     category = relationship("Category")
+
+    __table_args__ = (
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        Index("ix_tasks_user_id_estado_id", "user_id", "estado", "id"),
+        Index("ix_tasks_user_id_category_id_id", "user_id", "category_id", "id"),
+        Index("ix_tasks_user_id_fecha_tentiva", "user_id", "fecha_tentiva_finalizacion"),
+        # Global due-date order for the reminder scheduler's keyset window loads.
+        Index("ix_tasks_fecha_tentiva_id", "fecha_tentiva_finalizacion", "id"),
+        # Archival candidates only: the rows it covers are the ones the job removes.
+        Index(
+            "ix_tasks_finalizada_fecha_creacion",
+            "fecha_creacion",
+            "id",
+            postgresql_where=estado == "Finalizada",
+            sqlite_where=estado == "Finalizada",
+        ),
+        Index("ix_tasks_texto_fts", texto_tsvector(texto), postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Without AUTOINCREMENT SQLite reuses the highest rowids once they are
+        # archived, and tasks_archive would then hold a second row per id.
+        {"sqlite_autoincrement": True},
+    )
+
+
+# SQLite has no tsvector; keep an external-content FTS5 table in sync with triggers.
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(texto, content='tasks', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, texto) VALUES (new.id, new.texto); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, texto) VALUES ('delete', old.id, old.texto); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF texto ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, texto) VALUES ('delete', old.id, old.texto); "
+    "INSERT INTO tasks_fts(rowid, texto) VALUES (new.id, new.texto); END",
+)
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Task.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"))
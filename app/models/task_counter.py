@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+from app.db.database import Base
+
+
+class TaskCounter(Base):
+    """Per-user task counts, maintained by the task write paths.
+
+    One row per (user_id, dimension, key): dimension is "total", "estado"
+    or "category" and key the estado value or category id as text. The
+    "version" row counts write transactions and backs the task ETags.
+    """
+    __tablename__ = "task_counters"
+    user_id = Column(Integer, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
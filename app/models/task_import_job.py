@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from app.db.database import Base
+
+
+class TaskImportJob(Base):
+    """Progress of a /tasks/import upload, readable from every worker.
+
+    errors holds the first IMPORT_MAX_ERRORS row errors as a JSON list.
+    """
+    __tablename__ = "task_import_jobs"
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    format = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    imported = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    errors = Column(Text)
+    detail = Column(Text)
+    created_at = Column(DateTime, nullable=False, index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional
+
+class BatchOperation(BaseModel):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str = Field(..., max_length=2048)
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+class BatchResult(BaseModel):
+    index: int
+    status: int
+    headers: dict[str, str]
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    results: list[BatchResult]
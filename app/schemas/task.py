@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
 from typing import Optional
+from app.schemas.category import CategoryResponse
+from app.schemas.user import UserResponse
 
 class TaskStatus(str, Enum):
     sin_empezar = "Sin Empezar"
@@ -34,3 +36,53 @@ class TaskResponse(TaskBase):
 
     class Config:
         orm_mode = True 
+
+# ?expand= relations and the schema each one is nested with in a task response.
+TASK_EXPANSION_SCHEMAS = {"category": CategoryResponse, "user": UserResponse}
+
+class TaskFilters(BaseModel):
+    estado: Optional[TaskStatus] = None
+    category_id: Optional[int] = None
+    fecha_tentiva_desde: Optional[datetime] = None
+    fecha_tentiva_hasta: Optional[datetime] = None
+    q: Optional[str] = Field(None, max_length=255)
+
+class TaskBulkUpdate(TaskUpdate):
+    # Partial: only the fields sent for each item are applied.
+    id: int
+    fecha_tentiva_finalizacion: Optional[datetime] = None
+    estado: Optional[TaskStatus] = None
+    category_id: Optional[int] = None
+
+class TaskBulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+    task: Optional[TaskResponse] = None
+
+class TaskBulkResponse(BaseModel):
+    results: list[TaskBulkResult]
+
+class TaskStats(BaseModel):
+    total: int
+    por_estado: dict[str, int]
+    por_categoria: dict[str, int]
+    vencidas: int
+
+class TaskImportError(BaseModel):
+    row: int
+    error: str
+
+class TaskImportStatus(BaseModel):
+    id: str
+    status: str
+    format: str
+    processed: int
+    imported: int
+    failed: int
+    rows_per_second: float
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    detail: Optional[str] = None
+    errors: list[TaskImportError]
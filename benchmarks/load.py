@@ -0,0 +1,277 @@
+"""In-process load benchmark for the API.
+
+    python -m benchmarks.load [--database-url URL] [--concurrency 10] [--requests 200]
+                              [--scenarios login task_list ...] [--save NAME] [--compare NAME]
+
+Drives app.main.app through httpx's ASGI transport, so no server or network is
+involved: the numbers are the app, its middleware and the database. Without
+--database-url a fresh SQLite file in a temporary directory is used; pass a
+local Postgres URL to benchmark the production driver (the database is
+written to, use a scratch one).
+
+Each scenario reports p50/p95/p99 latency, throughput and the mean
+X-SQL-Count. --save writes benchmarks/baselines/NAME.json; --compare prints
+the change against a saved baseline and exits 1 when any p95 regresses by
+more than --threshold percent.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+USERNAME = "benchmark"
+PASSWORD = "benchmark-password"
+
+
+class Context:
+    def __init__(self, client, token: str, user_id: int, task_ids: list, category_ids: list):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # The seeded user; the database may already hold others.
+        self.user_id = user_id
+        self.task_ids = task_ids
+        self.category_ids = category_ids
+        self.doomed_ids = []
+        self.cursor = None
+
+    def task_payload(self) -> dict:
+        return {
+            "texto": f"benchmark {random.random():.6f}",
+            "estado": random.choice(["Sin Empezar", "Empezada", "Finalizada"]),
+            "category_id": random.choice(self.category_ids),
+            "fecha_tentiva_finalizacion": (datetime.now() + timedelta(days=random.randint(1, 60))).isoformat(),
+        }
+
+
+async def scenario_login(ctx: Context):
+    return await ctx.client.post("/auth/login", data={"username": USERNAME, "password": PASSWORD})
+
+
+async def scenario_task_create(ctx: Context):
+    return await ctx.client.post("/tasks/", params={"user_id": ctx.user_id}, json=ctx.task_payload())
+
+
+async def scenario_task_read(ctx: Context):
+    return await ctx.client.get(f"/tasks/{random.choice(ctx.task_ids)}")
+
+
+async def scenario_task_update(ctx: Context):
+    payload = {**ctx.task_payload(), "fecha_tentiva_finalizacion": None}
+    return await ctx.client.put(f"/tasks/{random.choice(ctx.task_ids)}", json=payload)
+
+
+async def scenario_task_delete(ctx: Context):
+    return await ctx.client.delete(f"/tasks/{ctx.doomed_ids.pop()}")
+
+
+async def scenario_task_list(ctx: Context):
+    # Walks the keyset pages and starts over at the end of the collection.
+    params = {"user_id": ctx.user_id, "limit": 50}
+    if ctx.cursor:
+        params["after"] = ctx.cursor
+    response = await ctx.client.get("/tasks/", params=params)
+    ctx.cursor = response.headers.get("x-next-cursor")
+    return response
+
+
+async def scenario_category_list(ctx: Context):
+    return await ctx.client.get("/categories/")
+
+
+async def scenario_category_read(ctx: Context):
+    return await ctx.client.get(f"/categories/{random.choice(ctx.category_ids)}")
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "task_create": scenario_task_create,
+    "task_read": scenario_task_read,
+    "task_update": scenario_task_update,
+    "task_list": scenario_task_list,
+    "category_list": scenario_category_list,
+    "category_read": scenario_category_read,
+    "task_delete": scenario_task_delete,
+}
+
+
+async def seed(client, tasks: int, doomed: int) -> Context:
+    await client.post("/auth/register", json={"nombre_usuario": USERNAME, "contrasenia": PASSWORD})
+    login = await client.post("/auth/login", data={"username": USERNAME, "password": PASSWORD})
+    login.raise_for_status()
+    token = login.json()["access_token"]
+    me = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    me.raise_for_status()
+
+    # Reuse the categories of an earlier run against the same database.
+    existing = await client.get("/categories/", params={"limit": 1000})
+    existing.raise_for_status()
+    by_name = {category["nombre"]: category["id"] for category in existing.json()}
+    category_ids = []
+    for index in range(5):
+        name = f"benchmark {index}"
+        if name not in by_name:
+            response = await client.post("/categories/", json={"nombre": name})
+            response.raise_for_status()
+            by_name[name] = response.json()["id"]
+        category_ids.append(by_name[name])
+
+    ctx = Context(client, token, me.json()["id"], [], category_ids)
+    total = tasks + doomed
+    for start in range(0, total, 500):
+        batch = [ctx.task_payload() for _ in range(min(500, total - start))]
+        response = await client.post("/tasks/bulk", params={"user_id": ctx.user_id}, json=batch)
+        response.raise_for_status()
+        ctx.task_ids.extend(result["id"] for result in response.json()["results"] if result["ok"])
+    ctx.doomed_ids = ctx.task_ids[tasks:]
+    ctx.task_ids = ctx.task_ids[:tasks]
+    return ctx
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_scenario(ctx: Context, scenario, requests: int, concurrency: int) -> dict:
+    latencies, sql_counts, errors = [], [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await scenario(ctx)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            if "x-sql-count" in response.headers:
+                sql_counts.append(int(response.headers["x-sql-count"]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "sql_per_request": round(statistics.fmean(sql_counts), 2) if sql_counts else None,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(BASELINES_DIR), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def benchmark(args) -> dict:
+    import httpx
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            doomed = args.requests if "task_delete" in args.scenarios else 0
+            ctx = await seed(client, args.seed_tasks, doomed)
+            results = {}
+            for name in args.scenarios:
+                results[name] = await run_scenario(ctx, SCENARIOS[name], args.requests, args.concurrency)
+                print_row(name, results[name])
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def print_row(name: str, result: dict):
+    sql = "-" if result["sql_per_request"] is None else f"{result['sql_per_request']:.2f}"
+    print(
+        f"{name:<15} {result['requests']:>6} {result['errors']:>6} {result['throughput_rps']:>9.1f}"
+        f" {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {sql:>6}"
+    )
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> bool:
+    print(f"\nvs. baseline {baseline['meta']['revision']} ({baseline['meta']['timestamp']}):")
+    regressed = False
+    for name, result in results.items():
+        before = baseline["scenarios"].get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        p95 = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        rps = (result["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+        flag = ""
+        if p95 > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{name:<15} p95 {p95:+7.1f}%  throughput {rps:+7.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--seed-tasks", type=int, default=1000)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--save", metavar="NAME", help="write benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so the environment is prepared first.
+    workdir = tempfile.mkdtemp(prefix="tasktracker-bench-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    random.seed(0)
+    print(f"{'scenario':<15} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql':>6}")
+    results = asyncio.run(benchmark(args))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed_tasks": args.seed_tasks,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+    if args.save:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        path = os.path.join(BASELINES_DIR, f"{args.save}.json")
+        with open(path, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"\nSaved {path}")
+    if args.compare:
+        with open(os.path.join(BASELINES_DIR, f"{args.compare}.json")) as baseline:
+            if compare(json.load(baseline), results, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
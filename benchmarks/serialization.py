@@ -0,0 +1,91 @@
+"""Per-item cost of GET /tasks/ serialization: ORM + Pydantic vs. columns + orjson.
+
+    python -m benchmarks.serialization [--sizes 1000 10000] [--repeat 5]
+
+Both paths run the same query against an in-memory SQLite database and must
+produce identical bytes; the default path mirrors what FastAPI does for a
+response_model (validate from attributes, dump in JSON mode, json.dumps).
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.models.category import Category
+from app.models.user import User
+from app.models.task import Task
+from app.schemas.task import TaskResponse
+from app.crud.task import get_tasks, RESPONSE_COLUMNS
+from app.core.serialization import json_rows
+
+adapter = TypeAdapter(list[TaskResponse])
+
+
+def pydantic_path(db, size: int) -> bytes:
+    tasks = get_tasks(db, 1, limit=size)
+    value = adapter.validate_python(tasks, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def fast_path(db, size: int) -> bytes:
+    return json_rows(get_tasks(db, 1, limit=size, columns=RESPONSE_COLUMNS)).body
+
+
+def seed(db, size: int):
+    db.execute(insert(User).values(id=1, nombre_usuario="bench", contrasenia="x"))
+    db.execute(insert(Category).values(id=1, nombre="bench"))
+    now = datetime.now()
+    db.execute(insert(Task), [
+        {
+            "texto": f"Tarea número {i}",
+            "fecha_creacion": now,
+            "fecha_tentiva_finalizacion": now + timedelta(days=i % 30) if i % 3 else None,
+            "estado": ("Sin Empezar", "Empezada", "Finalizada")[i % 3],
+            "user_id": 1,
+            "category_id": 1,
+        }
+        for i in range(size)
+    ])
+    db.commit()
+
+
+def best_of(fn, db, size: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db.expunge_all()
+        start = time.perf_counter()
+        fn(db, size)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>7} {'pydantic us/item':>17} {'orjson us/item':>15} {'speedup':>8}")
+    for size in args.sizes:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as db:
+            seed(db, size)
+            assert pydantic_path(db, size) == fast_path(db, size), "outputs differ"
+            slow = best_of(pydantic_path, db, size, args.repeat)
+            fast = best_of(fast_path, db, size, args.repeat)
+        engine.dispose()
+        print(f"{size:>7} {slow / size * 1e6:>17.2f} {fast / size * 1e6:>15.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
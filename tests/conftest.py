@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+# Settings are read once at import, so the environment must be in place before app is imported.
+TEST_DIR = tempfile.mkdtemp(prefix="tasktracker-tests-")
+TEST_ENV = {
+    "DATABASE_URL": f"sqlite:///{TEST_DIR}/app.db",
+    "SECRET_KEY": "test-secret",
+    "DB_ASYNC": "false",
+    "DATABASE_REPLICA_URLS": "",
+    "IDEMPOTENCY_DB": "false",
+    "PASSWORD_BCRYPT_ROUNDS": "4",
+    "TASK_STATS_RECONCILE_SECONDS": "0",
+    "TASK_ARCHIVE_INTERVAL_SECONDS": "0",
+    "REMINDERS_ENABLED": "false",
+}
+os.environ.update(TEST_ENV)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.db.database import engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@event.listens_for(engine, "connect")
+def _enforce_foreign_keys(connection, record):
+    # Postgres always enforces them; SQLite only when asked, per connection.
+    connection.execute("PRAGMA foreign_keys = ON")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user(client):
+    """A freshly registered user: {"id", "nombre_usuario", "headers"}."""
+    username = f"user-{uuid.uuid4().hex[:12]}"
+    response = client.post("/auth/register", json={"nombre_usuario": username, "contrasenia": "password1"})
+    assert response.status_code == 200, response.text
+    token = client.post("/auth/login", data={"username": username, "password": "password1"}).json()["access_token"]
+    return {**response.json(), "headers": {"Authorization": f"Bearer {token}"}}
+
+
+@pytest.fixture
+def category(client):
+    response = client.post("/categories/", json={"nombre": f"cat-{uuid.uuid4().hex[:12]}"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def create_tasks(client, user_id: int, category_id: int, count: int, **values) -> list:
+    payload = [{"texto": f"tarea {index}", "estado": "Empezada", "category_id": category_id, **values} for index in range(count)]
+    response = client.post(f"/tasks/bulk?user_id={user_id}", json=payload)
+    assert response.status_code == 200, response.text
+    return [result["task"] for result in response.json()["results"]]
+
+
+def run_isolated(code: str, timeout: float = 60, **env) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter against its own database, with extra settings in env.
+
+    For behaviour fixed at import time (DB_ASYNC, CORS, ...) that the shared
+    app in this process cannot switch.
+    """
+    database = os.path.join(tempfile.mkdtemp(dir=TEST_DIR), "app.db")
+    environment = {**os.environ, **TEST_ENV, "DATABASE_URL": f"sqlite:///{database}", **env}
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=environment,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
@@ -0,0 +1,17 @@
+from datetime import datetime, timedelta
+from app.crud.task_archive import archive_finished_tasks
+from app.db.database import SessionLocal
+from tests.conftest import create_tasks
+
+
+def test_archived_task_ids_are_never_reused(client, user, category):
+    archived = create_tasks(client, user["id"], category["id"], 2, estado="Finalizada")
+    with SessionLocal() as db:
+        assert archive_finished_tasks(db, datetime.now() + timedelta(days=1), 1000) >= 2
+
+    created = create_tasks(client, user["id"], category["id"], 1)[0]
+
+    assert created["id"] > max(task["id"] for task in archived)
+    listed = client.get("/tasks/", params={"user_id": user["id"], "include_archived": True}).json()
+    assert sorted(task["id"] for task in listed) == sorted([*(task["id"] for task in archived), created["id"]])
+    assert client.get(f"/tasks/{archived[0]['id']}").json()["estado"] == "Finalizada"
@@ -0,0 +1,33 @@
+from tests.conftest import run_isolated
+
+ASYNC_ROUND_TRIP = """
+from fastapi.testclient import TestClient
+from app.db import database
+from app.main import app
+
+assert database.get_db is database.get_async_db
+with TestClient(app) as client:
+    assert client.post("/auth/register", json={"nombre_usuario": "ana", "contrasenia": "password1"}).status_code == 200
+    token = client.post("/auth/login", data={"username": "ana", "password": "password1"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    category = client.post("/categories/", json={"nombre": "casa"}).json()
+    task = client.post("/tasks/?user_id=1", json={"texto": "comprar leche", "estado": "Empezada", "category_id": category["id"]}).json()
+    bulk = client.post("/tasks/bulk?user_id=1", json=[{"texto": "pagar luz", "estado": "Empezada", "category_id": category["id"]}])
+    assert bulk.status_code == 200, bulk.text
+    updated = client.put(f"/tasks/{task['id']}", json={"texto": "comprar leche", "fecha_tentiva_finalizacion": None, "estado": "Finalizada", "category_id": category["id"]})
+    assert updated.json()["estado"] == "Finalizada", updated.text
+    assert [row["texto"] for row in client.get("/tasks/", params={"user_id": 1, "q": "leche"}).json()] == ["comprar leche"]
+    assert client.get("/tasks/stats", params={"user_id": 1}).json()["por_estado"] == {"Empezada": 1, "Finalizada": 1}
+    assert len(client.get("/tasks/export", params={"user_id": 1}).text.splitlines()) == 2
+    assert client.get("/users/", headers=headers).json()[0]["nombre_usuario"] == "ana"
+    assert client.delete(f"/tasks/{task['id']}").status_code == 200
+    assert "primary_async" in client.get("/stats/pool").json()
+print("ok")
+"""
+
+
+def test_routers_serve_from_the_async_engine():
+    result = run_isolated(ASYNC_ROUND_TRIP, DB_ASYNC="true")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
@@ -0,0 +1,21 @@
+def test_principal_is_cached_until_the_user_changes(client, user):
+    def me():
+        response = client.get("/auth/me", headers=user["headers"])
+        return response, int(response.headers["X-SQL-Count"])
+
+    (first, resolved), (_, cached) = me(), me()
+    assert first.json()["id"] == user["id"]
+    assert cached == resolved - 1
+
+    client.put(f"/users/{user['id']}", json={"imagen_perfil": "avatar.png"}, headers=user["headers"])
+    updated, count = me()
+    assert updated.json()["imagen_perfil"] == "avatar.png"
+    assert count == resolved
+
+
+def test_deleted_user_is_rejected_at_once(client, user):
+    assert client.get("/auth/me", headers=user["headers"]).status_code == 200
+
+    assert client.delete(f"/users/{user['id']}", headers=user["headers"]).status_code == 200
+
+    assert client.get("/auth/me", headers=user["headers"]).status_code == 401
@@ -0,0 +1,41 @@
+from tests.conftest import create_tasks
+
+
+def test_batch_reports_each_operation_and_rolls_back_failures(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+    operations = [
+        {"method": "GET", "path": "/auth/me"},
+        {"method": "GET", "path": f"/tasks/{task['id']}?fields=texto"},
+        {"method": "POST", "path": f"/tasks/?user_id={user['id']}", "body": {"texto": "nueva", "estado": "Empezada", "category_id": category["id"]}},
+        {"method": "POST", "path": f"/tasks/?user_id={user['id']}", "body": {"texto": "mala", "estado": "Empezada", "category_id": 10 ** 9}},
+        {"method": "GET", "path": "/tasks/999999999"},
+        {"method": "GET", "path": f"/tasks/?user_id={user['id']}&fields=texto"},
+    ]
+
+    response = client.post("/batch", json=operations, headers=user["headers"])
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == list(range(len(operations)))
+    assert [result["status"] for result in results] == [200, 200, 200, 400, 404, 200]
+    assert results[0]["body"]["id"] == user["id"]
+    assert results[1]["body"] == {"texto": task["texto"], "id": task["id"]}
+    assert results[3]["body"]["detail"] == "Categoria no encontrada"
+    # The sequential read sees the earlier write and nothing of the failed one.
+    assert [row["texto"] for row in results[5]["body"]] == [task["texto"], "nueva"]
+
+
+def test_batch_requires_authentication(client):
+    response = client.post("/batch", json=[{"method": "GET", "path": "/auth/me"}])
+
+    assert response.status_code == 401
+
+
+def test_batch_rejects_excluded_paths_and_oversized_batches(client, user):
+    streaming = client.post("/batch", json=[{"method": "GET", "path": "/tasks/stream"}], headers=user["headers"])
+    nested = client.post("/batch", json=[{"method": "GET", "path": "/batch"}], headers=user["headers"])
+    oversized = client.post("/batch", json=[{"method": "GET", "path": "/auth/me"}] * 51, headers=user["headers"])
+
+    assert streaming.status_code == 400
+    assert nested.status_code == 400
+    assert oversized.status_code == 400
@@ -0,0 +1,21 @@
+import asyncio
+import httpx
+from benchmarks.load import SCENARIOS, run_scenario, seed
+
+
+def test_load_scenarios_use_the_seeded_user(client, user):
+    async def run():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+            ctx = await seed(http, 5, 0)
+            results = {name: await run_scenario(ctx, SCENARIOS[name], 5, 2) for name in ("task_create", "task_list", "task_read")}
+            listed = await http.get("/tasks/", params={"user_id": ctx.user_id, "limit": 1000})
+        return ctx, results, listed.json()
+
+    ctx, results, listed = asyncio.run(run())
+
+    # Other users exist already, so the benchmark user is not id 1.
+    assert ctx.user_id != 1
+    assert all(result["errors"] == 0 for result in results.values()), results
+    assert {task["user_id"] for task in listed} == {ctx.user_id}
+    assert len(listed) >= 10
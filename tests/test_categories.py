@@ -0,0 +1,32 @@
+from tests.conftest import run_isolated
+
+CONCURRENT_MISSES = """
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    for round in range(3):
+        # Every write invalidates the snapshot, so the concurrent reads all miss.
+        assert client.post("/categories/", json={"nombre": f"cat-{round}"}).status_code == 200
+        with ThreadPoolExecutor(8) as pool:
+            statuses = list(pool.map(lambda _: client.get("/categories/").status_code, range(8)))
+        assert statuses == [200] * 8, statuses
+print("ok")
+"""
+
+
+def test_concurrent_cache_misses_do_not_block_the_async_event_loop():
+    result = run_isolated(CONCURRENT_MISSES, timeout=60, DB_ASYNC="true")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
+
+
+def test_category_reads_see_local_writes(client, category):
+    client.put(f"/categories/{category['id']}", json={"descripcion": "actualizada"})
+
+    listed = {row["id"]: row for row in client.get("/categories/", params={"limit": 1000}).json()}
+
+    assert listed[category["id"]]["descripcion"] == "actualizada"
+    assert client.get(f"/categories/{category['id']}").json()["descripcion"] == "actualizada"
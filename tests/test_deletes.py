@@ -0,0 +1,43 @@
+from app.db.database import SessionLocal
+from app.models.task import Task
+from tests.conftest import create_tasks
+
+
+def test_delete_returns_the_deleted_row_once(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+
+    deleted = client.delete(f"/tasks/{task['id']}")
+    again = client.delete(f"/tasks/{task['id']}")
+
+    assert deleted.status_code == 200
+    assert deleted.json() == task
+    assert again.status_code == 404
+    assert client.get("/tasks/stats", params={"user_id": user["id"]}).json()["total"] == 0
+
+
+def test_deleting_a_category_detaches_its_tasks(client, user, category):
+    tasks = create_tasks(client, user["id"], category["id"], 2)
+
+    response = client.delete(f"/categories/{category['id']}")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == category["id"]
+    assert client.get(f"/categories/{category['id']}").status_code == 404
+    with SessionLocal() as db:
+        assert {db.get(Task, task["id"]).category_id for task in tasks} == {None}
+    stats = client.get("/tasks/stats", params={"user_id": user["id"]}).json()
+    assert (stats["total"], stats["por_categoria"]) == (2, {"none": 2})
+
+
+def test_deleting_a_user_detaches_their_tasks(client, user, category):
+    tasks = create_tasks(client, user["id"], category["id"], 2)
+
+    response = client.delete(f"/users/{user['id']}", headers=user["headers"])
+
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == user["id"]
+    with SessionLocal() as db:
+        assert {db.get(Task, task["id"]).user_id for task in tasks} == {None}
+    stats = client.get("/tasks/stats", params={"user_id": user["id"]}).json()
+    assert (stats["total"], stats["por_estado"]) == (0, {})
+    assert client.get("/tasks/", params={"user_id": user["id"]}).json() == []
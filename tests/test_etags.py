@@ -0,0 +1,44 @@
+from tests.conftest import create_tasks
+
+
+def test_list_etag_answers_304_until_a_write(client, user, category):
+    create_tasks(client, user["id"], category["id"], 2)
+    first = client.get("/tasks/", params={"user_id": user["id"]})
+    etag = first.headers["ETag"]
+
+    cached = client.get("/tasks/", params={"user_id": user["id"]}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    create_tasks(client, user["id"], category["id"], 1)
+    changed = client.get("/tasks/", params={"user_id": user["id"]}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 3
+
+
+def test_detail_etag_answers_304(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+    etag = client.get(f"/tasks/{task['id']}").headers["ETag"]
+
+    response = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+def test_detail_is_one_statement_and_changes_with_the_task(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+    first = client.get(f"/tasks/{task['id']}")
+    etag = first.headers["ETag"]
+
+    cached = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert (first.headers["X-SQL-Count"], cached.headers["X-SQL-Count"]) == ("1", "1")
+    assert first.json() == task
+
+    client.patch("/tasks/bulk", json=[{"id": task["id"], "texto": "cambiada"}])
+    changed = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["texto"] == "cambiada"
+    sparse = client.get(f"/tasks/{task['id']}", params={"fields": "texto"})
+    assert sparse.json() == {"id": task["id"], "texto": "cambiada"}
+    assert sparse.headers["ETag"] != changed.headers["ETag"]
@@ -0,0 +1,42 @@
+import orjson
+from datetime import datetime
+from app.core import events
+
+
+class RecordingSession:
+    def __init__(self):
+        self.info = {}
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        self.statements.append((statement, parameters))
+
+
+def _message(index: int) -> dict:
+    task = {"id": index, "texto": "x" * 200, "fecha_creacion": datetime(2024, 1, 1), "estado": "Finalizada", "user_id": 1}
+    return {"type": "updated", "user_id": 1, "task": task}
+
+
+def test_pg_notify_sends_one_statement_per_transaction(monkeypatch):
+    monkeypatch.setattr(events.settings, "EVENTS_PG_NOTIFY", True)
+    session = RecordingSession()
+    messages = [_message(index) for index in range(500)]
+    events._queue(session, messages)
+
+    events._notify_before_commit(session)
+
+    assert len(session.statements) == 1
+    statement, parameters = session.statements[0]
+    assert statement is events.NOTIFY_STATEMENT
+    assert all(len(payload.encode()) < 8000 for payload in parameters["payloads"])
+    delivered = [message for payload in parameters["payloads"] for message in orjson.loads(payload)]
+    assert delivered == [orjson.loads(events.encode_event(message)) for message in messages]
+    assert "task_events" not in session.info
+
+
+def test_oversized_events_become_a_resync():
+    huge = {"type": "updated", "user_id": 7, "task": {"texto": "x" * 10000}}
+
+    payloads = events.notify_payloads([huge])
+
+    assert [orjson.loads(payload) for payload in payloads] == [[{"type": "resync", "user_id": 7}]]
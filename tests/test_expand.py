@@ -0,0 +1,25 @@
+from tests.conftest import create_tasks
+
+
+def test_expand_loads_relations_in_a_fixed_number_of_queries(client, user, category):
+    params = {"user_id": user["id"], "expand": "category,user"}
+    create_tasks(client, user["id"], category["id"], 2)
+    few = client.get("/tasks/", params=params)
+    create_tasks(client, user["id"], category["id"], 6)
+    many = client.get("/tasks/", params=params)
+
+    assert len(many.json()) == 8
+    assert many.headers["X-SQL-Count"] == few.headers["X-SQL-Count"]
+    first = many.json()[0]
+    assert first["category"] == category
+    assert first["user"] == {key: value for key, value in user.items() if key != "headers"}
+
+
+def test_expand_on_the_detail_and_unknown_relations(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+
+    detail = client.get(f"/tasks/{task['id']}", params={"expand": "category", "fields": "texto"})
+
+    assert detail.json() == {"id": task["id"], "texto": task["texto"], "category": category}
+    assert "ETag" not in detail.headers
+    assert client.get(f"/tasks/{task['id']}", params={"expand": "owner"}).status_code == 400
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from tests.conftest import create_tasks
+
+
+def test_search_export_builds_its_query_off_the_event_loop(client, user, category, monkeypatch):
+    from app.api import tasks as tasks_api
+
+    build = tasks_api.export_tasks_query
+    on_loop = []
+
+    def export_tasks_query(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(tasks_api, "export_tasks_query", export_tasks_query)
+    wanted = create_tasks(client, user["id"], category["id"], 1, texto="pagar el arriendo")[0]
+    create_tasks(client, user["id"], category["id"], 1, texto="lavar la ropa")
+
+    response = client.get("/tasks/export", params={"user_id": user["id"], "q": "arriendo"})
+
+    assert response.status_code == 200
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [wanted["id"]]
+    assert on_loop == [False]
+
+
+def test_export_streams_rows_in_batches(client, user, category):
+    from app.crud.task import export_tasks_query, EXPORT_COLUMNS
+    from app.db.database import SessionLocal, stream_partitions
+
+    created = create_tasks(client, user["id"], category["id"], 5)
+    with SessionLocal() as db:
+        query = export_tasks_query(db, user["id"])
+
+    async def collect():
+        return [[row.id for row in rows] async for rows in stream_partitions(query, 2)]
+
+    ids = [task["id"] for task in created]
+    assert asyncio.run(collect()) == [ids[:2], ids[2:4], ids[4:]]
+
+    response = client.get("/tasks/export", params={"user_id": user["id"], "format": "csv"})
+    lines = response.text.splitlines()
+    assert response.headers["content-type"].startswith("text/csv")
+    assert lines[0] == ",".join(column.key for column in EXPORT_COLUMNS)
+    assert [int(line.split(",")[0]) for line in lines[1:]] == ids
+
+
+def test_csv_header_is_sent_before_the_first_batch():
+    from app.core.export import encode_export
+
+    async def first_chunk():
+        released = asyncio.Event()
+
+        async def partitions():
+            await released.wait()
+            yield []
+
+        chunks = encode_export(partitions(), "csv", ["id", "texto"])
+        header = await asyncio.wait_for(chunks.__anext__(), 1)
+        released.set()
+        await chunks.aclose()
+        return header
+
+    assert asyncio.run(first_chunk()) == "id,texto\r\n"
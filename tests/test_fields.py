@@ -0,0 +1,30 @@
+from tests.conftest import create_tasks
+
+
+def test_fields_project_task_lists_and_details(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+
+    listed = client.get("/tasks/", params={"user_id": user["id"], "fields": "estado,texto"})
+    detail = client.get(f"/tasks/{task['id']}", params={"fields": "estado"})
+
+    # id is always returned, and keys follow the schema's order.
+    assert [list(row) for row in listed.json()] == [["texto", "estado", "id"]]
+    assert listed.json()[0] == {"id": task["id"], "texto": task["texto"], "estado": task["estado"]}
+    assert detail.json() == {"id": task["id"], "estado": task["estado"]}
+
+
+def test_fields_on_users_and_categories(client, user, category):
+    users = client.get("/users/", params={"fields": "nombre_usuario", "limit": 1000}, headers=user["headers"])
+    one = client.get(f"/users/{user['id']}", params={"fields": "nombre_usuario"}, headers=user["headers"])
+    categories = client.get("/categories/", params={"fields": "nombre", "limit": 1000})
+
+    assert {"id": user["id"], "nombre_usuario": user["nombre_usuario"]} in users.json()
+    assert one.json() == {"id": user["id"], "nombre_usuario": user["nombre_usuario"]}
+    assert {"id": category["id"], "nombre": category["nombre"]} in categories.json()
+
+
+def test_unknown_fields_are_rejected(client, user):
+    response = client.get("/tasks/", params={"user_id": user["id"], "fields": "texto,contrasenia"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Campos no soportados: contrasenia"
@@ -0,0 +1,121 @@
+import uuid
+import pytest
+
+
+def test_retry_with_same_key_replays_the_first_response(client, category, user):
+    key = uuid.uuid4().hex
+    body = {"texto": "una vez", "estado": "Empezada", "category_id": category["id"]}
+
+    first = client.post(f"/tasks/?user_id={user['id']}", json=body, headers={"Idempotency-Key": key})
+    retry = client.post(f"/tasks/?user_id={user['id']}", json=body, headers={"Idempotency-Key": key})
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert len(client.get("/tasks/", params={"user_id": user["id"]}).json()) == 1
+
+
+def test_same_key_with_another_body_is_rejected(client, category, user):
+    key = uuid.uuid4().hex
+    body = {"texto": "original", "estado": "Empezada", "category_id": category["id"]}
+    client.post(f"/tasks/?user_id={user['id']}", json=body, headers={"Idempotency-Key": key})
+
+    response = client.post(f"/tasks/?user_id={user['id']}", json={**body, "texto": "otra"}, headers={"Idempotency-Key": key})
+
+    assert response.status_code == 422
+    assert len(client.get("/tasks/", params={"user_id": user["id"]}).json()) == 1
+
+
+def test_rejections_and_replays_carry_the_callers_cors_headers(client, category, user):
+    key = uuid.uuid4().hex
+    body = {"texto": "cors", "estado": "Empezada", "category_id": category["id"]}
+    url = f"/tasks/?user_id={user['id']}"
+    client.post(url, json=body, headers={"Idempotency-Key": key, "Origin": "http://localhost:5173"})
+
+    replay = client.post(url, json=body, headers={"Idempotency-Key": key, "Origin": "http://localhost:3000"})
+    mismatch = client.post(url, json={**body, "texto": "otra"}, headers={"Idempotency-Key": key, "Origin": "http://localhost:3000"})
+    invalid = client.post(url, json=body, headers={"Idempotency-Key": "x" * 300, "Origin": "http://localhost:3000"})
+
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    for response in (replay, mismatch, invalid):
+        assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert replay.headers.get_list("access-control-allow-origin") == ["http://localhost:3000"]
+    assert (mismatch.status_code, invalid.status_code) == (422, 400)
+
+
+def test_keys_are_scoped_to_the_caller(client, category, user):
+    other = client.post("/auth/register", json={"nombre_usuario": f"user-{uuid.uuid4().hex[:12]}", "contrasenia": "password1"}).json()
+    key = uuid.uuid4().hex
+    body = {"texto": "mia", "estado": "Empezada", "category_id": category["id"]}
+
+    mine = client.post(f"/tasks/?user_id={user['id']}", json=body, headers={"Idempotency-Key": key})
+    theirs = client.post(f"/tasks/?user_id={other['id']}", json={**body, "texto": "suya"}, headers={"Idempotency-Key": key})
+
+    assert (mine.status_code, theirs.status_code) == (200, 200)
+    assert "Idempotent-Replayed" not in theirs.headers
+    assert theirs.json()["user_id"] == other["id"]
+    assert theirs.json()["texto"] == "suya"
+
+
+def test_bearer_callers_do_not_share_keys(client, user):
+    other_name = f"user-{uuid.uuid4().hex[:12]}"
+    client.post("/auth/register", json={"nombre_usuario": other_name, "contrasenia": "password1"})
+    other_token = client.post("/auth/login", data={"username": other_name, "password": "password1"}).json()["access_token"]
+    key = uuid.uuid4().hex
+
+    mine = client.post("/categories/", json={"nombre": f"a-{key}"}, headers={**user["headers"], "Idempotency-Key": key})
+    theirs = client.post("/categories/", json={"nombre": f"b-{key}"}, headers={"Authorization": f"Bearer {other_token}", "Idempotency-Key": key})
+
+    assert (mine.status_code, theirs.status_code) == (200, 200)
+    assert theirs.json()["nombre"] == f"b-{key}"
+
+
+def test_database_claim_only_reports_a_conflict_for_an_existing_key(monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from app.core.idempotency import DatabaseIdempotencyStore
+    from app.db import database
+
+    store = DatabaseIdempotencyStore()
+    key = f"claim {uuid.uuid4().hex}"
+    assert store._claim(key, "fingerprint") is True
+    assert store._claim(key, "fingerprint") is False
+
+    class BrokenSession(database.SessionLocal.class_):
+        def commit(self):
+            raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(database, "SessionLocal", lambda: BrokenSession(bind=database.engine))
+    with pytest.raises(OperationalError):
+        store._claim(f"claim {uuid.uuid4().hex}", "fingerprint")
+
+
+def test_cancelled_request_releases_its_claim(monkeypatch):
+    import asyncio
+    from sqlalchemy import select
+    from app.core import idempotency
+    from app.db.database import SessionLocal
+    from app.models.idempotency_key import IdempotencyKey
+
+    async def disconnected(scope, receive, send):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(idempotency.settings, "IDEMPOTENCY_DB", True)
+    middleware = idempotency.IdempotencyMiddleware(disconnected)
+    key = uuid.uuid4().hex
+    scope = {
+        "type": "http", "method": "POST", "path": "/tasks/", "query_string": b"user_id=1",
+        "headers": [(b"idempotency-key", key.encode())],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        pass
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(middleware(scope, receive, send))
+
+    with SessionLocal() as db:
+        assert db.scalars(select(IdempotencyKey.key).where(IdempotencyKey.key.endswith(key))).all() == []
@@ -0,0 +1,42 @@
+import json
+import uuid
+from datetime import datetime
+from app.db.database import SessionLocal
+from app.models.task_import_job import TaskImportJob
+
+
+def test_import_reports_progress_and_row_errors(client, user, category):
+    lines = [
+        json.dumps({"texto": "importada 1", "estado": "Empezada", "category_id": category["id"]}),
+        "{no es json",
+        json.dumps({"texto": "sin estado", "category_id": category["id"]}),
+        json.dumps({"texto": "importada 2", "estado": "Finalizada", "category_id": category["id"]}),
+    ]
+
+    accepted = client.post(
+        "/tasks/import",
+        params={"user_id": user["id"]},
+        files={"file": ("tareas.ndjson", "\n".join(lines).encode())},
+    )
+    assert accepted.status_code == 202, accepted.text
+    status = client.get(f"/tasks/import/{accepted.json()['id']}").json()
+
+    assert (status["status"], status["processed"], status["imported"], status["failed"]) == ("completed", 4, 2, 2)
+    assert [error["row"] for error in status["errors"]] == [2, 3]
+    assert status["errors"][0]["error"] == "JSON inválido"
+    texts = [task["texto"] for task in client.get("/tasks/", params={"user_id": user["id"]}).json()]
+    assert texts == ["importada 1", "importada 2"]
+
+
+def test_import_status_is_read_from_the_database(client):
+    # As written by the worker that received the upload.
+    job_id = uuid.uuid4().hex
+    with SessionLocal() as db:
+        db.add(TaskImportJob(id=job_id, user_id=1, format="csv", status="running", imported=10, failed=1, errors="[]", created_at=datetime.now(), started_at=datetime.now()))
+        db.commit()
+
+    status = client.get(f"/tasks/import/{job_id}")
+
+    assert status.status_code == 200
+    assert (status.json()["status"], status.json()["processed"]) == ("running", 11)
+    assert client.get(f"/tasks/import/{uuid.uuid4().hex}").status_code == 404
@@ -0,0 +1,42 @@
+import re
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.database import QueryStats, engine, query_stats
+
+
+def metric(body: str, name: str, **labels) -> float:
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", body, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_requests_are_counted_per_route_template(client, user):
+    labels = {"method": "GET", "route": "/tasks/{task_id}"}
+    before = client.get("/metrics").text
+
+    missing = client.get("/tasks/999999999")
+    after = client.get("/metrics").text
+
+    assert int(missing.headers["X-SQL-Count"]) >= 1
+    assert metric(after, "http_requests_total", **labels, status="404") == metric(before, "http_requests_total", **labels, status="404") + 1
+    assert metric(after, "http_request_duration_seconds_count", **labels) == metric(before, "http_request_duration_seconds_count", **labels) + 1
+    assert "/tasks/999999999" not in after
+
+
+def test_failed_statements_leave_no_timing_state_behind():
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM missing_table"))
+            connection.execute(text("SELECT 1"))
+            leftovers = connection.info.get("query_start")
+    finally:
+        query_stats.reset(token)
+
+    assert stats.count == 4
+    assert not leftovers
+    assert stats.duration > 0
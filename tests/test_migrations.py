@@ -0,0 +1,86 @@
+from sqlalchemy import create_engine, inspect, select, text
+from app.crud.task_stats import VERSION
+from app.db.migrations import SCHEMA_VERSION, check_schema, ensure_schema, migrate
+from app.models.task_counter import TaskCounter
+
+# What create_all produced for the original models, before schema versioning.
+BASELINE_DDL = (
+    "CREATE TABLE users (id INTEGER NOT NULL, nombre_usuario VARCHAR, contrasenia VARCHAR, imagen_perfil VARCHAR, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_users_nombre_usuario ON users (nombre_usuario)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    "CREATE TABLE categories (id INTEGER NOT NULL, nombre VARCHAR, descripcion VARCHAR, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_categories_nombre ON categories (nombre)",
+    "CREATE INDEX ix_categories_id ON categories (id)",
+    "CREATE TABLE tasks (id INTEGER NOT NULL, texto VARCHAR, fecha_creacion DATETIME, fecha_tentiva_finalizacion DATETIME, "
+    "estado VARCHAR(11), user_id INTEGER, category_id INTEGER, PRIMARY KEY (id), "
+    "FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(category_id) REFERENCES categories (id))",
+    "CREATE INDEX ix_tasks_id ON tasks (id)",
+)
+
+
+def baseline_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/baseline.db")
+    with engine.begin() as connection:
+        for statement in BASELINE_DDL:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO users (id, nombre_usuario, contrasenia) VALUES (1, 'ana', 'x')"))
+        connection.execute(text("INSERT INTO categories (id, nombre) VALUES (1, 'casa')"))
+        connection.execute(text(
+            "INSERT INTO tasks (texto, fecha_creacion, estado, user_id, category_id) VALUES "
+            "('comprar leche', '2024-01-01 00:00:00', 'Empezada', 1, 1), "
+            "('pagar luz', '2024-01-02 00:00:00', 'Finalizada', 1, 1)"
+        ))
+    return engine
+
+
+def test_baseline_database_migrates_to_current_version(tmp_path):
+    engine = baseline_engine(tmp_path)
+    assert check_schema(engine) is None
+
+    applied = migrate(engine)
+
+    assert applied == SCHEMA_VERSION
+    assert check_schema(engine) == SCHEMA_VERSION
+    inspector = inspect(engine)
+    assert {"task_counters", "idempotency_keys", "tasks_archive", "task_import_jobs", "schema_version"} <= set(inspector.get_table_names())
+    assert "ix_tasks_user_id_id" in {index["name"] for index in inspector.get_indexes("tasks")}
+    with engine.connect() as connection:
+        # Rows written before the FTS table existed are searchable.
+        matches = connection.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'leche'")).scalars().all()
+        counters = dict(connection.execute(
+            select(TaskCounter.dimension, TaskCounter.count).where(TaskCounter.user_id == 1, TaskCounter.dimension != VERSION, TaskCounter.key.in_(("", "Empezada")))
+        ).all())
+    assert matches == [1]
+    assert counters == {"total": 2, "estado": 1}
+
+
+def test_sqlite_tasks_are_rebuilt_with_autoincrement(tmp_path):
+    engine = baseline_engine(tmp_path)
+    migrate(engine)
+
+    with engine.begin() as connection:
+        ddl = connection.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'"))
+        # Simulate the highest task having been archived before the upgrade.
+        connection.execute(text("INSERT INTO tasks_archive (id, texto, estado, user_id, archived_at) VALUES (7, 'vieja', 'Finalizada', 1, '2024-01-01')"))
+        connection.execute(text("DELETE FROM schema_version WHERE version >= 8"))
+    migrate(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO tasks (texto, estado, user_id, category_id) VALUES ('recibo de agua', 'Empezada', 1, 1)"))
+        new_id = connection.scalar(text("SELECT max(id) FROM tasks"))
+        # The FTS triggers were recreated with the table.
+        matches = connection.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'agua'")).scalars().all()
+        indexes = {index["name"] for index in inspect(connection).get_indexes("tasks")}
+
+    assert "AUTOINCREMENT" in ddl.upper()
+    assert new_id == 8
+    assert matches == [8]
+    assert {"ix_tasks_user_id_id", "ix_tasks_finalizada_fecha_creacion"} <= indexes
+
+
+def test_migrated_database_is_left_alone(tmp_path):
+    engine = baseline_engine(tmp_path)
+    migrate(engine)
+
+    assert migrate(engine) == 0
+    ensure_schema(engine)
+    assert check_schema(engine) == SCHEMA_VERSION
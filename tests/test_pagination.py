@@ -0,0 +1,39 @@
+from tests.conftest import create_tasks
+
+
+def walk(client, url, limit, **params):
+    seen, after, pages = [], None, 0
+    while True:
+        page = {**params, "limit": limit}
+        if after:
+            page["after"] = after
+        response = client.get(url, params=page)
+        assert response.status_code == 200
+        seen.extend(row["id"] for row in response.json())
+        pages += 1
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            return seen, pages
+
+
+def test_cursor_pagination_walks_every_task_once(client, user, category):
+    created = create_tasks(client, user["id"], category["id"], 5)
+
+    seen, pages = walk(client, "/tasks/", 2, user_id=user["id"])
+
+    assert seen == [task["id"] for task in created]
+    assert pages == 3
+
+
+def test_cursor_pagination_walks_every_category_once(client, category):
+    expected = [row["id"] for row in client.get("/categories/", params={"limit": 1000}).json()]
+
+    seen, _ = walk(client, "/categories/", 3)
+
+    assert seen == expected
+
+
+def test_invalid_cursor_is_rejected(client, user):
+    response = client.get("/tasks/", params={"user_id": user["id"], "after": "not-a-cursor"})
+
+    assert response.status_code == 400
@@ -0,0 +1,38 @@
+from app.core.config import settings
+from tests.conftest import run_isolated
+
+POOL_TIMEOUT = """
+from sqlalchemy import exc
+from app.db.database import engine, get_pool_status
+
+held = engine.connect()
+try:
+    engine.connect()
+except exc.TimeoutError:
+    pass
+else:
+    raise AssertionError("checkout beyond the pool did not time out")
+status = get_pool_status()["primary"]
+assert (status["size"], status["checked_out"], status["timeouts"], status["checkouts"]) == (1, 1, 1, 1), status
+held.close()
+print("ok")
+"""
+
+
+def test_pool_stats_count_checkouts(client):
+    before = client.get("/stats/pool").json()["primary"]
+
+    client.get("/tasks/", params={"user_id": 1})
+    after = client.get("/stats/pool").json()["primary"]
+
+    assert after["pool"] == "InstrumentedQueuePool"
+    assert (after["size"], after["max_overflow"]) == (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    assert after["checkouts"] > before["checkouts"]
+    assert after["timeouts"] == before["timeouts"]
+
+
+def test_pool_stats_record_timeouts():
+    result = run_isolated(POOL_TIMEOUT, DB_POOL_SIZE="1", DB_MAX_OVERFLOW="0", DB_POOL_TIMEOUT="1")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
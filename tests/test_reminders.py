@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app.db.database import SessionLocal
+from app.jobs import reminders
+from app.models.task import Task
+from tests.conftest import create_tasks
+
+
+def fired_for(monkeypatch, task_ids):
+    fired = []
+    monkeypatch.setattr(reminders, "publish_events", fired.extend)
+    return lambda: [(message["task_id"], message["kind"]) for message in fired if message["task_id"] in task_ids]
+
+
+def run_until(scheduler, moment):
+    asyncio.run(scheduler._fire(scheduler._pop_due(moment)))
+
+
+def test_reminders_fire_upcoming_then_overdue(client, user, category, monkeypatch):
+    due = (datetime.now() + timedelta(minutes=10)).replace(microsecond=0)
+    task = create_tasks(client, user["id"], category["id"], 1, fecha_tentiva_finalizacion=due.isoformat())[0]
+    fired = fired_for(monkeypatch, {task["id"]})
+    scheduler = reminders.ReminderScheduler()
+    asyncio.run(scheduler._load(datetime.now()))
+
+    run_until(scheduler, due - timedelta(seconds=1))
+    assert fired() == [(task["id"], reminders.UPCOMING)]
+    run_until(scheduler, due)
+    assert fired() == [(task["id"], reminders.UPCOMING), (task["id"], reminders.OVERDUE)]
+    run_until(scheduler, due + timedelta(hours=1))
+    assert len(fired()) == 2
+
+
+def test_finishing_a_task_cancels_its_reminders(client, user, category, monkeypatch):
+    due = (datetime.now() + timedelta(minutes=10)).replace(microsecond=0)
+    heard, unheard = create_tasks(client, user["id"], category["id"], 2, fecha_tentiva_finalizacion=due.isoformat())
+    fired = fired_for(monkeypatch, {heard["id"], unheard["id"]})
+    scheduler = reminders.ReminderScheduler()
+    asyncio.run(scheduler._load(datetime.now()))
+
+    # One through an event, the other written by a worker this one never hears from.
+    scheduler.on_event({"type": "updated", "user_id": user["id"], "task": {**heard, "estado": "Finalizada"}})
+    with SessionLocal() as db:
+        db.execute(update(Task).where(Task.id == unheard["id"]).values(estado="Finalizada"))
+        db.commit()
+    run_until(scheduler, due + timedelta(seconds=1))
+
+    assert fired() == []
+
+
+def test_rescan_picks_up_deadlines_set_elsewhere(client, user, category, monkeypatch):
+    due = (datetime.now() + timedelta(minutes=10)).replace(microsecond=0)
+    scheduler = reminders.ReminderScheduler()
+    asyncio.run(scheduler._load(datetime.now()))
+    task = create_tasks(client, user["id"], category["id"], 1, fecha_tentiva_finalizacion=due.isoformat())[0]
+    fired = fired_for(monkeypatch, {task["id"]})
+
+    run_until(scheduler, due)
+    assert fired() == []
+    asyncio.run(scheduler._rescan(datetime.now()))
+    run_until(scheduler, due)
+    assert fired() == [(task["id"], reminders.OVERDUE)]
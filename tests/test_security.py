@@ -0,0 +1,41 @@
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from fastapi import HTTPException
+from app.core import security
+
+
+def _kill_a_hash_worker():
+    executor = security._get_hash_executor()
+    # Make sure the workers are up before killing one of them.
+    asyncio.run(security.hash_password_async("calentar"))
+    pid = next(iter(executor._processes))
+    os.kill(pid, signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while executor._processes.get(pid) is not None and executor._processes[pid].is_alive() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return executor
+
+
+def test_a_dead_hash_worker_does_not_break_later_logins(client, user):
+    broken = _kill_a_hash_worker()
+
+    response = client.post("/auth/login", data={"username": user["nombre_usuario"], "password": "password1"})
+
+    assert response.status_code == 200
+    assert security._get_hash_executor() is not broken
+    assert security.verify_password("nueva", asyncio.run(security.hash_password_async("nueva")))
+
+
+def test_a_pool_that_keeps_breaking_answers_503(monkeypatch):
+    async def broken(*args):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(asyncio.BaseEventLoop, "run_in_executor", lambda loop, executor, fn, *args: broken())
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(security.hash_password_async("nueva"))
+    assert raised.value.status_code == 503
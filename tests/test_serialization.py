@@ -0,0 +1,21 @@
+import pytest
+from app.core.config import settings
+from tests.conftest import create_tasks
+
+
+@pytest.mark.parametrize("url", ["/tasks/", "/categories/", "/users/"])
+def test_fast_json_matches_the_pydantic_response(client, user, category, monkeypatch, url):
+    create_tasks(client, user["id"], category["id"], 1, texto="añadir ñandú", fecha_tentiva_finalizacion="2030-01-02T03:04:05.123456")
+    create_tasks(client, user["id"], category["id"], 1, estado="Sin Empezar")
+    params = {"user_id": user["id"], "limit": 1000}
+
+    def fetch(fast: bool):
+        monkeypatch.setattr(settings, "FAST_JSON", fast)
+        response = client.get(url, params=params, headers=user["headers"])
+        assert response.status_code == 200
+        return response
+
+    fast, validated = fetch(True), fetch(False)
+
+    assert fast.json() == validated.json()
+    assert fast.headers["content-type"] == "application/json"
@@ -0,0 +1,23 @@
+from tests.conftest import run_isolated
+
+LAZY_IMPORTS = """
+import sys
+from fastapi.testclient import TestClient
+from app.main import app
+
+lazy = ("app.jobs.reminders", "app.jobs.task_import", "app.jobs.task_archive", "app.core.pg_listener")
+with TestClient(app) as client:
+    assert client.get("/").status_code == 200
+    loaded = [name for name in lazy if name in sys.modules]
+    assert loaded == [], loaded
+    assert client.get("/tasks/import/missing").status_code == 404
+    assert "app.jobs.task_import" in sys.modules
+print("ok")
+"""
+
+
+def test_disabled_jobs_and_rare_endpoints_are_not_imported_at_startup():
+    result = run_isolated(LAZY_IMPORTS)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
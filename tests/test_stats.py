@@ -0,0 +1,26 @@
+from sqlalchemy import delete
+from app.db.database import SessionLocal
+from app.models.task_counter import TaskCounter
+from tests.conftest import create_tasks
+
+
+def test_counters_follow_writes_and_rebuild_from_the_tasks(client, user, category):
+    started = create_tasks(client, user["id"], category["id"], 3, fecha_tentiva_finalizacion="2000-01-01T00:00:00")
+    create_tasks(client, user["id"], category["id"], 1, estado="Sin Empezar")
+    client.patch("/tasks/bulk", json=[{"id": started[0]["id"], "estado": "Finalizada"}])
+    client.delete(f"/tasks/{started[1]['id']}")
+    expected = {
+        "total": 3,
+        "por_estado": {"Empezada": 1, "Finalizada": 1, "Sin Empezar": 1},
+        "por_categoria": {str(category["id"]): 3},
+        "vencidas": 1,
+    }
+
+    assert client.get("/tasks/stats", params={"user_id": user["id"]}).json() == expected
+
+    with SessionLocal() as db:
+        db.execute(delete(TaskCounter).where(TaskCounter.user_id == user["id"]))
+        db.commit()
+    assert client.get("/tasks/stats", params={"user_id": user["id"]}).json()["total"] == 0
+    rebuilt = client.post("/tasks/stats/rebuild", params={"user_id": user["id"]})
+    assert rebuilt.json() == expected
@@ -0,0 +1,90 @@
+from tests.conftest import create_tasks
+
+
+def test_bulk_patch_applies_partial_updates(client, user, category):
+    first, second = create_tasks(client, user["id"], category["id"], 2, fecha_tentiva_finalizacion="2030-01-01T00:00:00")
+
+    response = client.patch("/tasks/bulk", json=[
+        {"id": first["id"], "estado": "Finalizada"},
+        {"id": second["id"], "texto": "renombrada", "fecha_tentiva_finalizacion": None},
+    ])
+
+    assert response.status_code == 200, response.text
+    updated = {result["id"]: result["task"] for result in response.json()["results"]}
+    assert updated[first["id"]] == {**first, "estado": "Finalizada"}
+    assert updated[second["id"]] == {**second, "texto": "renombrada", "fecha_tentiva_finalizacion": None}
+    stats = client.get("/tasks/stats", params={"user_id": user["id"]}).json()
+    assert stats["por_estado"] == {"Empezada": 1, "Finalizada": 1}
+
+
+def test_bulk_delete_reports_repeated_ids_as_deleted(client, user, category):
+    task = create_tasks(client, user["id"], category["id"], 1)[0]
+
+    response = client.request("DELETE", "/tasks/bulk", json=[task["id"], task["id"], 999999999])
+
+    results = response.json()["results"]
+    assert [(result["id"], result["ok"]) for result in results] == [(task["id"], True), (task["id"], True), (999999999, False)]
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+
+
+def test_search_without_the_fts_table_falls_back_to_a_scan(client, user, category, monkeypatch):
+    from sqlalchemy import text
+    from app.crud import task as task_crud
+    from app.db.database import engine
+    from app.db.migrations import _task_search
+
+    wanted = create_tasks(client, user["id"], category["id"], 1, texto="pagar el arriendo")[0]
+    create_tasks(client, user["id"], category["id"], 1, texto="lavar la ropa")
+    monkeypatch.setattr(task_crud, "_fts_databases", set())
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE tasks_fts"))
+    try:
+        response = client.get("/tasks/", params={"user_id": user["id"], "q": "arriendo"})
+    finally:
+        with engine.begin() as connection:
+            _task_search(connection)
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == [wanted["id"]]
+    indexed = client.get("/tasks/", params={"user_id": user["id"], "q": "arriendo"})
+    assert [task["id"] for task in indexed.json()] == [wanted["id"]]
+
+
+def test_bulk_reports_invalid_items_without_rejecting_the_batch(client, user, category):
+    created = client.post(f"/tasks/bulk?user_id={user['id']}", json=[
+        {"texto": "valida", "estado": "Empezada", "category_id": category["id"]},
+        {"texto": "x" * 300, "estado": "Empezada", "category_id": category["id"]},
+    ])
+
+    assert created.status_code == 200, created.text
+    first, second = created.json()["results"]
+    assert first["ok"] and first["task"]["texto"] == "valida"
+    assert (second["index"], second["ok"]) == (1, False)
+    assert second["error"].startswith("texto:")
+
+    updated = client.patch("/tasks/bulk", json=[{"id": first["id"], "estado": "Nada"}, {"id": first["id"], "texto": "renombrada"}])
+    assert updated.status_code == 200, updated.text
+    invalid, valid = updated.json()["results"]
+    assert (invalid["id"], invalid["ok"], valid["ok"]) == (first["id"], False, True)
+    assert invalid["error"].startswith("estado:")
+    assert valid["task"] == {**first["task"], "texto": "renombrada"}
+
+
+def test_bulk_patch_groups_identical_updates_and_keeps_item_order(client, user, category):
+    tasks = create_tasks(client, user["id"], category["id"], 8)
+
+    def patch(items):
+        response = client.patch("/tasks/bulk", json=items)
+        assert response.status_code == 200, response.text
+        return response
+
+    few = patch([{"id": task["id"], "estado": "Finalizada"} for task in tasks[:2]])
+    many = patch([{"id": task["id"], "estado": "Finalizada"} for task in tasks])
+    assert many.headers["X-SQL-Count"] == few.headers["X-SQL-Count"]
+
+    # The same id again later in the batch is applied after the first item.
+    repeated = patch([{"id": tasks[0]["id"], "estado": "Empezada"}, {"id": tasks[1]["id"], "estado": "Empezada"}, {"id": tasks[0]["id"], "estado": "Finalizada"}])
+    assert [result["task"]["estado"] for result in repeated.json()["results"]] == ["Empezada", "Empezada", "Finalizada"]
+    assert client.get(f"/tasks/{tasks[0]['id']}").json()["estado"] == "Finalizada"
+    stats = client.get("/tasks/stats", params={"user_id": user["id"]}).json()
+    assert stats["por_estado"] == {"Empezada": 1, "Finalizada": 7}